@@ -1,11 +1,13 @@
 # backend/app/config/settings.py
 
+from functools import cached_property, lru_cache
 from pydantic_settings import BaseSettings
-from pathlib import Path
+import os
 
 class Settings(BaseSettings):
     # LLM Configuration
     ollama_model: str = "mistral"
+    llm_max_concurrent_requests: int = 4  # generations in flight process-wide (chat and stream); match Ollama's OLLAMA_NUM_PARALLEL
     
     # Document Processing Configuration
     chunk_size: int = 1000
@@ -24,6 +26,9 @@ class Settings(BaseSettings):
     # Embedding Configuration
     embedding_model_name: str = "bge-large-en-v1.5"
     embedding_model_device: str = "cpu"  # or "cuda"
+    embedding_batch_size: int = 64  # texts per forward pass when encoding
+    vector_embedding_model: str = "all-MiniLM-L6-v2"  # model behind the vector store; changing it requires re-indexing
+    vector_embedding_device: str = "auto"  # "auto" picks cuda, then mps, then cpu
 
     # Generation Parameters
     generation_temperature: float = 0.2
@@ -33,19 +38,37 @@ class Settings(BaseSettings):
     # Retrieval Configuration
     retrieval_top_k: int = 3
     similarity_threshold: float = 0.7  # New: minimum similarity score
+    max_context_tokens: int = 1000  # token budget for retrieved context in the prompt
+    query_embedding_batch_size: int = 32  # max concurrent queries embedded in one forward pass
+    query_embedding_batch_window_ms: float = 0.0  # extra wait for more queries; 0 batches only queries already waiting
+    
+    # Vector Index (HNSW) Configuration - applied when a collection is created
+    hnsw_m: int = 16  # graph links per node
+    hnsw_construction_ef: int = 128  # candidate list size while building
+    hnsw_search_ef: int = 32  # candidate list size per query; keep >= retrieved candidates
+    
+    # Streaming Configuration - adjacent LLM output is merged into one SSE chunk
+    sse_coalesce_min_chars: int = 128  # send once this much text is pending...
+    sse_coalesce_max_delay_ms: float = 30.0  # ...or this long after the previous chunk
     
     # File Management Configuration
     max_file_size_mb: int = 50  # New: maximum file size in MB
     supported_file_types: list = [".txt", ".pdf", ".docx"]  # New: allowed file extensions
     keep_original_files: bool = False  # New: whether to backup original files
+    document_hash_algorithm: str = "sha256"  # "sha256" or "blake3"; changing it changes stored document hashes
     
     # Data Storage Configuration
     data_cleanup_enabled: bool = True  # New: enable automatic cleanup of orphaned data
     max_chunks_per_document: int = 1000  # New: safety limit for very large documents
+    index_batch_size: int = 64  # chunks per vector DB insert when indexing
     
     # Performance Configuration
     enable_caching: bool = True  # New: enable response caching
     cache_ttl_minutes: int = 30  # New: cache time-to-live in minutes
+    semantic_cache_threshold: float = 0.95  # min cosine similarity for a cached chat response to be reused
+    semantic_cache_max_entries: int = 256  # cached responses kept per company
+    semantic_context_threshold: float = 0.9  # min cosine similarity for a cached retrieval context to be reused
+    persist_semantic_caches: bool = True  # snapshot semantic caches on shutdown and reload them on startup
     
     # Development Configuration
     debug_mode: bool = False  # New: enable detailed debugging
@@ -53,15 +76,21 @@ class Settings(BaseSettings):
     
     class Config:
         env_file = ".env"
+        frozen = True  # read-only after the one validated build in get_settings
         
     def get_max_file_size_bytes(self) -> int:
         """Convert max file size from MB to bytes"""
         return self.max_file_size_mb * 1024 * 1024
     
+    @cached_property
+    def _supported_set(self) -> frozenset:
+        """Supported extensions as a set for O(1) lookups"""
+        return frozenset(self.supported_file_types)
+    
     def is_supported_file_type(self, filename: str) -> bool:
         """Check if file type is supported"""
-        file_extension = Path(filename).suffix.lower()
-        return file_extension in self.supported_file_types
+        file_extension = os.path.splitext(filename)[1].lower()
+        return file_extension in self._supported_set
     
     def validate_chunk_size(self) -> bool:
         """Validate chunk size configuration"""
@@ -72,4 +101,9 @@ class Settings(BaseSettings):
             self.min_chunk_length > 0
         )
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build and validate settings once per process"""
+    return Settings()
+
+settings = get_settings()
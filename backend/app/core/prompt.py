@@ -3,40 +3,35 @@
 import re
 import logging
 
+__all__ = ["build_prompt", "sanitize_user_input"]
+
 # ---------------------------
 # Logging Setup
 # ---------------------------
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-def sanitize_user_input(text: str) -> str:
-    logger.debug(f"Sanitizing user input: {text}")
-
-    # Trim + collapse whitespace
-    text = text.strip()
-    text = re.sub(r"\s+", " ", text)
-
-    # Remove suspicious characters or injection attempts
-    text = re.sub(r"[{}\[\]<>]", "", text)  # brackets
-    text = re.sub(r"(?i)system:|assistant:|user:", "", text)  # prompt injection tricks
-    text = re.sub(r"(--|\|\||;|\\|`)", "", text)
-
-    # Truncate to 1000 chars for safety
-    sanitized = text[:1000]
-    logger.info(f"Sanitized input (length {len(sanitized)}): {sanitized}")
-    return sanitized
-
-
-def build_prompt(context: str, user_input: str) -> str:
-    logger.info("Building refined assistant prompt...")
+# ---------------------------
+# Sanitization Patterns
+# ---------------------------
+# Whitespace runs collapse to one space and brackets are dropped in the same
+# pass; role markers and injection characters stay separate passes so that
+# tokens split by stripped characters (e.g. "sys{tem:") are still caught.
+_WS_BRACKETS_RE = re.compile(r"(\s+)|[{}\[\]<>]")
+_ROLE_RE = re.compile(r"(?i)system:|assistant:|user:")
+_INJECT_RE = re.compile(r"--|\|\||[;\\`]")
 
-    sanitized_input = sanitize_user_input(user_input)
+# Sanitized input is capped at MAX_INPUT_CHARS; raw input is clamped to a
+# generous multiple first so oversized payloads are not scanned in full.
+MAX_INPUT_CHARS = 1000
+_RAW_INPUT_LIMIT = MAX_INPUT_CHARS * 4
 
-    if not context.strip():
-        logger.warning("Context is empty. Substituting with minimal fallback.")
-        context = "[No context was available.]"
 
-    system_instruction = """
+# ---------------------------
+# Prompt Template
+# ---------------------------
+# Stripped and laid out once at import; build_prompt only fills the slots.
+_SYSTEM_INSTRUCTION = """
 You are a precise, trustworthy, and context-aware assistant. 
 Your goal is to answer user questions using only the information provided in the CONTEXT below.
 Do not rely on outside knowledge, and do not speculate. Be clear, factual, and concise.
@@ -78,19 +73,56 @@ Unacceptable:
 - "As an AI language model..."
 - "Based on general knowledge..."
 - "According to the uploaded document..."
-"""
+""".strip()
 
-    prompt = f"""{system_instruction.strip()}
+_PROMPT_TEMPLATE = _SYSTEM_INSTRUCTION + """
 
 CONTEXT:
 --------------------
-{context.strip()}
+{context}
 --------------------
 
 USER MESSAGE:
-"{sanitized_input}"
+"{user_input}"
 
 RESPONSE:"""
 
+
+def _ws_or_bracket(match: re.Match) -> str:
+    return " " if match.group(1) else ""
+
+
+def sanitize_user_input(text: str) -> str:
+    logger.debug(f"Sanitizing user input: {text}")
+
+    # Clamp before any regex work; the passes below only shrink the text
+    if len(text) > _RAW_INPUT_LIMIT:
+        text = text[:_RAW_INPUT_LIMIT]
+
+    # Trim + collapse whitespace, remove brackets
+    text = text.strip()
+    text = _WS_BRACKETS_RE.sub(_ws_or_bracket, text)
+
+    # Remove suspicious characters or injection attempts
+    text = _ROLE_RE.sub("", text)  # prompt injection tricks
+    text = _INJECT_RE.sub("", text)
+
+    # Truncate to 1000 chars for safety
+    sanitized = text[:MAX_INPUT_CHARS]
+    logger.info(f"Sanitized input (length {len(sanitized)}): {sanitized}")
+    return sanitized
+
+
+def build_prompt(context: str, user_input: str) -> str:
+    logger.info("Building refined assistant prompt...")
+
+    sanitized_input = sanitize_user_input(user_input)
+
+    if not context.strip():
+        logger.warning("Context is empty. Substituting with minimal fallback.")
+        context = "[No context was available.]"
+
+    prompt = _PROMPT_TEMPLATE.format(context=context.strip(), user_input=sanitized_input)
+
     logger.debug(f"Prompt preview:\n{prompt[:800]}...")
     return prompt
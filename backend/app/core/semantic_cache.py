@@ -0,0 +1,227 @@
+# backend/app/core/semantic_cache.py
+
+import io
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+import numpy as np
+import orjson
+from app.config.settings import settings
+
+# ---------------------------
+# Logging Setup
+# ---------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Caches created with a name, for snapshots across restarts
+_named_caches: Dict[str, "SemanticCache"] = {}
+
+class _NamespaceEntries:
+    """
+    Key embeddings (one int8 row each, with a per-row scale), values and
+    expiry times, oldest first
+    """
+    __slots__ = ("vectors", "scales", "values", "expires")
+
+    def __init__(self, dim: int):
+        self.vectors = np.empty((0, dim), dtype=np.int8)
+        self.scales = np.empty(0, dtype=np.float32)
+        self.values = []
+        self.expires = []
+
+    def drop_oldest(self, count: int) -> None:
+        self.vectors = self.vectors[count:]
+        self.scales = self.scales[count:]
+        del self.values[:count]
+        del self.expires[:count]
+
+class SemanticCache:
+    """
+    Per-namespace cache keyed by embedding similarity. A lookup hits when a
+    stored key embedding has cosine similarity >= threshold with the query
+    embedding. Entries expire after ttl_seconds and each namespace keeps at
+    most max_entries, evicting the oldest.
+    """
+
+    def __init__(self, threshold: float, max_entries: int, ttl_seconds: float, name: Optional[str] = None):
+        self.name = name
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._namespaces: Dict[str, _NamespaceEntries] = {}
+        self._lock = threading.Lock()
+        if name is not None:
+            _named_caches[name] = self
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _quantize(vector: np.ndarray):
+        """Symmetric int8 quantization of a unit vector: (int8 row, scale)"""
+        scale = float(np.abs(vector).max()) / 127 or 1.0
+        return np.rint(vector / scale).astype(np.int8), scale
+
+    @staticmethod
+    def _expire(entries: _NamespaceEntries, now: float) -> None:
+        """Drop expired entries; entries are stored in expiry order, oldest first"""
+        expired = 0
+        for expires_at in entries.expires:
+            if expires_at > now:
+                break
+            expired += 1
+        if expired:
+            entries.drop_oldest(expired)
+
+    def get(self, namespace: str, embedding) -> Optional[Any]:
+        """Return the value of the most similar live entry above the threshold, if any"""
+        vector = self._normalize(embedding)
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if entries is not None:
+                self._expire(entries, time.monotonic())
+                if entries.values and entries.vectors.shape[1] == vector.shape[0]:
+                    scores = (entries.vectors @ vector) * entries.scales
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.threshold:
+                        self.hits += 1
+                        logger.debug(f"Semantic cache hit | Namespace: {namespace} | Similarity: {scores[best]:.3f}")
+                        return entries.values[best]
+            self.misses += 1
+            return None
+
+    def put(self, namespace: str, embedding, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value under a key embedding"""
+        vector = self._normalize(embedding)
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if entries is None or entries.vectors.shape[1] != vector.shape[0]:
+                entries = self._namespaces[namespace] = _NamespaceEntries(vector.shape[0])
+            quantized, scale = self._quantize(vector)
+            entries.vectors = np.vstack((entries.vectors, quantized))
+            entries.scales = np.append(entries.scales, np.float32(scale))
+            entries.values.append(value)
+            entries.expires.append(time.monotonic() + ttl_seconds)
+            if len(entries.values) > self.max_entries:
+                entries.drop_oldest(len(entries.values) - self.max_entries)
+
+    def invalidate(self, namespace: str) -> None:
+        """Drop every entry of a namespace"""
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+
+    def save(self, path: Path) -> int:
+        """
+        Snapshot live entries to an .npz file: the int8 key embeddings and
+        their scales plus one JSON blob with each entry's namespace, value and
+        wall-clock expiry.
+        Values must be JSON-serializable. Returns the number of entries saved.
+        """
+        now = time.monotonic()
+        wall_offset = time.time() - now  # expiry times are monotonic in memory
+        vectors = []
+        scales = []
+        records = []
+        with self._lock:
+            for namespace, entries in self._namespaces.items():
+                self._expire(entries, now)
+                vectors.append(entries.vectors)
+                scales.append(entries.scales)
+                records.extend(
+                    {"namespace": namespace, "value": value, "expires_at": expires_at + wall_offset}
+                    for value, expires_at in zip(entries.values, entries.expires)
+                )
+
+        if not records:
+            # Nothing live: remove an older snapshot so it is not restored later
+            path.unlink(missing_ok=True)
+            return 0
+
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            vectors=np.vstack(vectors),
+            scales=np.concatenate(scales),
+            records=np.frombuffer(orjson.dumps(records), dtype=np.uint8)
+        )
+        # Write next to the target and swap it in, so a crash never leaves a torn file
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(buffer.getvalue())
+        os.replace(tmp_path, path)
+        return len(records)
+
+    def load(self, path: Path) -> int:
+        """Restore entries saved by save(); returns the number of entries loaded"""
+        with np.load(path) as snapshot:
+            vectors = snapshot["vectors"].astype(np.float32) * snapshot["scales"][:, None]
+            records = orjson.loads(snapshot["records"].tobytes())
+
+        loaded = 0
+        now = time.time()
+        for vector, record in zip(vectors, records):
+            ttl_seconds = record["expires_at"] - now
+            if ttl_seconds > 0:
+                self.put(record["namespace"], vector, record["value"], ttl_seconds=ttl_seconds)
+                loaded += 1
+        return loaded
+
+# ---------------------------
+# Response Cache
+# ---------------------------
+# Finished chat responses per company, keyed by the message embedding
+response_cache = (
+    SemanticCache(
+        threshold=settings.semantic_cache_threshold,
+        max_entries=settings.semantic_cache_max_entries,
+        ttl_seconds=settings.cache_ttl_minutes * 60,
+        name="responses"
+    )
+    if settings.enable_caching else None
+)
+
+def invalidate_response_cache(namespace: str) -> None:
+    """Drop cached responses for a namespace after its documents change"""
+    if response_cache is not None:
+        response_cache.invalidate(namespace)
+
+# ---------------------------
+# Snapshots
+# ---------------------------
+def save_semantic_caches(directory: Path) -> None:
+    """Snapshot every named cache into directory (called on shutdown)"""
+    if not settings.persist_semantic_caches or not _named_caches:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, cache in _named_caches.items():
+        try:
+            saved = cache.save(directory / f"{name}.npz")
+            logger.info(f"Saved {saved} semantic cache entries: {name}")
+        except Exception as e:
+            logger.warning(f"Failed to save semantic cache '{name}': {e}")
+
+def load_semantic_caches(directory: Path) -> None:
+    """Restore named caches from snapshots in directory (called on startup)"""
+    if not settings.persist_semantic_caches:
+        return
+    for name, cache in _named_caches.items():
+        path = directory / f"{name}.npz"
+        if not path.exists():
+            continue
+        try:
+            loaded = cache.load(path)
+            # Only a clean shutdown may leave a snapshot behind: entries
+            # invalidated after startup must not come back after a crash
+            path.unlink(missing_ok=True)
+            logger.info(f"Loaded {loaded} semantic cache entries: {name}")
+        except Exception as e:
+            logger.warning(f"Failed to load semantic cache '{name}': {e}")
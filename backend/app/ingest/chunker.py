@@ -2,10 +2,12 @@
 
 import logging
 import re
+from bisect import bisect_right
+from itertools import accumulate
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from pathlib import Path
-from app.config.settings import settings
+from app.config.settings import get_settings
 from app.llm.tokenizer import get_tokenizer
 
 # ---------------------------
@@ -14,9 +16,43 @@ from app.llm.tokenizer import get_tokenizer
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-@dataclass
+# ---------------------------
+# Preprocessing Patterns
+# ---------------------------
+_TAB_TABLE = str.maketrans({'\t': ' '})
+_MULTI_SPACE_RE = re.compile(r' {2,}')
+_NL_WS_RE = re.compile(r' *\n *')
+_MULTI_NL_RE = re.compile(r'\n{3,}')
+# Whitespace before punctuation is dropped and whitespace after sentence
+# punctuation collapses to one space, in a single pass
+_PUNCT_ADJ_RE = re.compile(r'(\s+)(?=[.!?;,:])|(?<=[.!?])\s+')
+
+# Characters of chunk tail tokenized per overlap token when finding the overlap window
+_TAIL_CHARS_PER_TOKEN = 8
+
+
+def _punct_space(match: re.Match) -> str:
+    return "" if match.group(1) else " "
+
+
+def _has_word_chars(text: str, minimum: int) -> bool:
+    """Whether text holds at least `minimum` word characters (as in regex \\w)"""
+    count = 0
+    for ch in text:
+        if ch.isalnum() or ch == '_':
+            count += 1
+            if count >= minimum:
+                return True
+    return False
+
+
+@dataclass(slots=True, frozen=True)
 class ChunkMetadata:
-    """Metadata for each text chunk"""
+    """Metadata for each text chunk
+
+    Documents the metadata schema; ``_create_chunk_data`` builds the same
+    fields as a plain dict so no instance is allocated per chunk.
+    """
     chunk_index: int
     start_char: int
     end_char: int
@@ -34,21 +70,43 @@ class DocumentChunker:
                  chunk_overlap: int = None,
                  min_chunk_length: int = None):
         
-        self.chunk_size = chunk_size or settings.chunk_size
-        self.chunk_overlap = chunk_overlap or settings.chunk_overlap
-        self.min_chunk_length = min_chunk_length or settings.min_chunk_length
+        # Read settings once; chunking loops only touch plain attributes
+        config = get_settings()
+        self.chunk_size = chunk_size or config.chunk_size
+        self.chunk_overlap = chunk_overlap or config.chunk_overlap
+        self.min_chunk_length = min_chunk_length or config.min_chunk_length
 
         # New: Token-aware configuration
-        self.token_chunk_size = settings.token_chunk_size
-        self.token_overlap = settings.token_chunk_overlap
+        self.token_chunk_size = config.token_chunk_size
+        self.token_overlap = config.token_chunk_overlap
         self.tokenizer = get_tokenizer()
+        # Fast (Rust) tokenizers are counted through the backend directly,
+        # skipping the Python-side id lists and BatchEncoding wrappers
+        self._backend_tokenizer = (
+            self.tokenizer.backend_tokenizer
+            if self.tokenizer and getattr(self.tokenizer, "is_fast", False)
+            else None
+        )
+        self.paragraph_sep_tokens = self._count_tokens("\n\n")  # cost of joining two paragraphs
+        # With a real tokenizer a chunk's token count is the running total of
+        # its units; the len // 4 estimate floors per unit, so it is recounted
+        self._sum_token_counts = bool(self.tokenizer)
+        # Chunks are packed on running totals of unit sizes. Without a tokenizer
+        # the sizes are characters against the bound len(chunk) // 4 <= limit,
+        # since summing per-unit estimates would overshoot the limit
+        if self.tokenizer:
+            self._pack_limit = self.token_chunk_size
+            self._pack_sep_size = self.paragraph_sep_tokens
+        else:
+            self._pack_limit = 4 * self.token_chunk_size + 3
+            self._pack_sep_size = 2
                 
         # Sentence boundary patterns
         self.sentence_endings = re.compile(r'[.!?]+\s+')
         self.paragraph_breaks = re.compile(r'\n\s*\n')
         self.section_headers = re.compile(r'^[A-Z][A-Z\s]{2,}:?\s*$|^\d+\.\s+[A-Z]|^#+\s+')
         
-        logger.info(f"DocumentChunker initialized | Chunk size: {self.chunk_size} | Overlap: {self.chunk_overlap}")
+        logger.info("DocumentChunker initialized | Chunk size: %d | Overlap: %d", self.chunk_size, self.chunk_overlap)
     
     def chunk_text(self, text: str, document_type: str = "generic") -> List[Dict[str, Any]]:
         """
@@ -61,7 +119,7 @@ class DocumentChunker:
         Returns:
             List of chunk dictionaries with text and metadata
         """
-        logger.info(f"Starting chunking process | Document type: {document_type} | Text length: {len(text)}")
+        logger.info("Starting chunking process | Document type: %s | Text length: %d", document_type, len(text))
         
         # Preprocess text
         cleaned_text = self._preprocess_text(text)
@@ -75,86 +133,117 @@ class DocumentChunker:
             chunks = self._chunk_generic_text(cleaned_text)
         
         # Add overlap and finalize
-        final_chunks = self._add_overlap_and_validate(chunks, cleaned_text)
+        final_chunks = self._add_overlap_and_validate(chunks)
         
-        logger.info(f"Chunking completed | Generated {len(final_chunks)} chunks")
+        logger.info("Chunking completed | Generated %d chunks", len(final_chunks))
         return final_chunks
 
     def _count_tokens(self, text: str) -> int:
         """Count tokens using the configured tokenizer"""
+        if self._backend_tokenizer is not None:
+            return len(self._backend_tokenizer.encode(text, add_special_tokens=False))
         if not self.tokenizer:
             return len(text) // 4  # fallback estimate
         return len(self.tokenizer.encode(text, add_special_tokens=False))
     
+    def _batch_token_counts(self, units: List[str]) -> List[int]:
+        """Count tokens for many units with a single tokenizer call"""
+        if not units:
+            return []
+        if self._backend_tokenizer is not None:
+            return [len(encoding) for encoding in
+                    self._backend_tokenizer.encode_batch(units, add_special_tokens=False)]
+        if not self.tokenizer:
+            return [len(unit) // 4 for unit in units]  # fallback estimate
+        return self.tokenizer(units, add_special_tokens=False, return_length=True)["length"]
+    
+    def _pack_sizes(self, units: List[str]) -> List[int]:
+        """Sizes to pack units on: token counts, or characters without a tokenizer"""
+        if self.tokenizer:
+            return self._batch_token_counts(units)
+        return [len(unit) for unit in units]
+    
     def _preprocess_text(self, text: str) -> str:
         """Clean and normalize text before chunking"""
         logger.debug("Preprocessing text...")
         
         # Normalize whitespace but preserve paragraph breaks
-        text = re.sub(r'[ \t]+', ' ', text)  # Multiple spaces/tabs to single space
-        text = re.sub(r'\n[ \t]+', '\n', text)  # Remove spaces after newlines
-        text = re.sub(r'[ \t]+\n', '\n', text)  # Remove spaces before newlines
+        text = text.translate(_TAB_TABLE)  # Tabs to spaces
+        text = _MULTI_SPACE_RE.sub(' ', text)  # Multiple spaces to single space
+        text = _NL_WS_RE.sub('\n', text)  # Remove spaces around newlines
         
         # Normalize paragraph breaks (max 2 consecutive newlines)
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        text = _MULTI_NL_RE.sub('\n\n', text)
         
         # Remove excessive spaces around punctuation
-        text = re.sub(r'\s+([.!?;,:])', r'\1', text)
-        text = re.sub(r'([.!?])\s+', r'\1 ', text)
+        text = _PUNCT_ADJ_RE.sub(_punct_space, text)
         
         # Clean up common document artifacts
-        text = re.sub(r'\f', '\n\n', text)  # Form feeds to paragraph breaks
+        text = text.replace('\f', '\n\n')  # Form feeds to paragraph breaks
         text = text.strip()
         
-        logger.debug(f"Text preprocessing completed | Length: {len(text)}")
+        logger.debug("Text preprocessing completed | Length: %d", len(text))
         return text
     
     def _chunk_generic_text(self, text: str) -> List[Dict[str, Any]]:
         """Default chunking strategy for generic text"""
         logger.debug("Using generic text chunking strategy")
         
-        # Split by paragraphs first
-        paragraphs = self.paragraph_breaks.split(text)
+        # Split by paragraphs first, dropping empty and too-short ones
+        min_length = self.min_chunk_length
+        paragraphs = [para.strip() for para in self.paragraph_breaks.split(text)]
+        paragraphs = [para for para in paragraphs if para and len(para) >= min_length]
+        para_sizes = self._pack_sizes(paragraphs)
         chunks = []
-        current_chunk = ""
+        # Accumulate paragraphs in a list with running totals so each paragraph
+        # is copied and tokenized once instead of re-tokenizing the whole chunk
+        current_parts: List[str] = []
+        current_len = 0
+        current_size = 0
+        sep_size = self._pack_sep_size
         chunk_index = 0
         start_char = 0
+        size_limit = self._pack_limit
         
-        for para in paragraphs:
-            para = para.strip()
-            if not para or len(para) < self.min_chunk_length:
-                continue
-            
+        for para, para_size in zip(paragraphs, para_sizes):
             # If paragraph fits in current chunk by token count
-            if self._count_tokens(current_chunk + "\n\n" + para) <= self.token_chunk_size:
-                if current_chunk:
-                    current_chunk += "\n\n" + para
-                else:
-                    current_chunk = para
+            if current_size + sep_size + para_size <= size_limit:
+                if current_parts:
+                    current_len += 2
+                    current_size += sep_size
+                current_parts.append(para)
+                current_len += len(para)
+                current_size += para_size
             else:
                 # Save current chunk
-                if current_chunk:
+                if current_parts:
                     chunk_data = self._create_chunk_data(
-                        current_chunk, chunk_index, start_char, "paragraph"
+                        "\n\n".join(current_parts), chunk_index, start_char, "paragraph",
+                        token_count=current_size if self._sum_token_counts else None
                     )
                     chunks.append(chunk_data)
                     chunk_index += 1
-                    start_char += len(current_chunk)
+                    start_char += current_len
                 
                 # Handle large paragraphs that exceed token limit
-                if self._count_tokens(para) > self.token_chunk_size:
+                if para_size > size_limit:
                     sentence_chunks = self._split_by_sentences(para, chunk_index, start_char)
                     chunks.extend(sentence_chunks)
                     chunk_index += len(sentence_chunks)
                     start_char += len(para)
-                    current_chunk = ""
+                    current_parts = []
+                    current_len = 0
+                    current_size = 0
                 else:
-                    current_chunk = para
+                    current_parts = [para]
+                    current_len = len(para)
+                    current_size = para_size
         
         # Add remaining content
-        if current_chunk:
+        if current_parts:
             chunk_data = self._create_chunk_data(
-                current_chunk, chunk_index, start_char, "paragraph"
+                "\n\n".join(current_parts), chunk_index, start_char, "paragraph",
+                token_count=current_size if self._sum_token_counts else None
             )
             chunks.append(chunk_data)
         
@@ -162,47 +251,67 @@ class DocumentChunker:
     
     def _split_by_sentences(self, text: str, start_index: int, start_char: int) -> List[Dict[str, Any]]:
         """Split large text by sentences when paragraphs are too big"""
-        logger.debug(f"Splitting large text by sentences | Length: {len(text)}")
+        logger.debug("Splitting large text by sentences | Length: %d", len(text))
         
         sentences = self.sentence_endings.split(text)
+        last_sentence = len(sentences) - 1
         chunks = []
-        current_chunk = ""
+        current_parts: List[str] = []
+        current_len = 0
+        current_size = 0
         chunk_index = start_index
         char_offset = start_char
+        size_limit = self._pack_limit
         
+        # Split pieces hold no sentence boundaries of their own; the only ones
+        # in a group are the ". " endings re-added below, and the count is
+        # one more than that unless the group ends on the final sentence
+        units = []
         for i, sentence in enumerate(sentences):
             sentence = sentence.strip()
             if not sentence:
                 continue
             
             # Add sentence ending back (except for last sentence)
-            if i < len(sentences) - 1:
+            if i < last_sentence:
                 sentence += ". "
-            
+            units.append(sentence)
+        
+        for sentence, sentence_size in zip(units, self._pack_sizes(units)):
             # Token-aware limit
-            if self._count_tokens(current_chunk + sentence) <= self.token_chunk_size:
-                current_chunk += sentence
+            if current_size + sentence_size <= size_limit:
+                current_parts.append(sentence)
+                current_len += len(sentence)
+                current_size += sentence_size
             else:
-                if current_chunk:
+                if current_parts:
                     chunk_data = self._create_chunk_data(
-                        current_chunk, chunk_index, char_offset, "sentence_group"
+                        "".join(current_parts), chunk_index, char_offset, "sentence_group",
+                        sentence_count=len(current_parts) + current_parts[-1].endswith(". "),
+                        token_count=current_size if self._sum_token_counts else None
                     )
                     chunks.append(chunk_data)
                     chunk_index += 1
-                    char_offset += len(current_chunk)
+                    char_offset += current_len
                 
-                if self._count_tokens(sentence) > self.token_chunk_size:
+                if sentence_size > size_limit:
                     overflow_chunks = self._split_overflow_text(sentence, chunk_index, char_offset)
                     chunks.extend(overflow_chunks)
                     chunk_index += len(overflow_chunks)
                     char_offset += len(sentence)
-                    current_chunk = ""
+                    current_parts = []
+                    current_len = 0
+                    current_size = 0
                 else:
-                    current_chunk = sentence
+                    current_parts = [sentence]
+                    current_len = len(sentence)
+                    current_size = sentence_size
         
-        if current_chunk:
+        if current_parts:
             chunk_data = self._create_chunk_data(
-                current_chunk, chunk_index, char_offset, "sentence_group"
+                "".join(current_parts), chunk_index, char_offset, "sentence_group",
+                sentence_count=len(current_parts) + current_parts[-1].endswith(". "),
+                token_count=current_size if self._sum_token_counts else None
             )
             chunks.append(chunk_data)
         
@@ -210,62 +319,84 @@ class DocumentChunker:
     
     def _split_overflow_text(self, text: str, start_index: int, start_char: int) -> List[Dict[str, Any]]:
         """Handle text that's too long even for sentence-based chunking"""
-        logger.debug(f"Handling overflow text | Length: {len(text)}")
+        logger.debug("Handling overflow text | Length: %d", len(text))
         
         chunks = []
         chunk_index = start_index
         
         words = text.split()
-        current_chunk_words = []
-        for word in words:
-            trial_chunk = " ".join(current_chunk_words + [word])
-            if self._count_tokens(trial_chunk) <= self.token_chunk_size:
-                current_chunk_words.append(word)
-            else:
-                chunk_text = " ".join(current_chunk_words)
-                chunk_data = self._create_chunk_data(
-                    chunk_text, chunk_index, start_char, "overflow"
-                )
-                chunks.append(chunk_data)
-                chunk_index += 1
-                start_char += len(chunk_text)
-                current_chunk_words = [word]
-        
-        if current_chunk_words:
-            chunk_text = " ".join(current_chunk_words)
+        if not words:
+            return chunks
+        
+        # Running totals per word; each cut is the furthest word whose total
+        # stays within base + limit, found by bisection
+        if self.tokenizer:
+            totals = list(accumulate(self._batch_token_counts(words)))
+            limit = self.token_chunk_size
+        else:
+            # Without a tokenizer the estimate is len(chunk) // 4, so pack on
+            # characters (each word plus one separator) against the same bound
+            totals = list(accumulate(len(word) + 1 for word in words))
+            limit = 4 * self.token_chunk_size + 4
+        word_total = len(words)
+        start = 0
+        base = 0
+        
+        while start < word_total:
+            end = bisect_right(totals, base + limit, start)
+            if end == start:
+                end = start + 1  # a single word over the limit is emitted alone
+            
+            chunk_text = " ".join(words[start:end])
             chunk_data = self._create_chunk_data(
-                chunk_text, chunk_index, start_char, "overflow"
+                chunk_text, chunk_index, start_char, "overflow",
+                word_count=end - start,
+                token_count=totals[end - 1] - base if self._sum_token_counts else None
             )
             chunks.append(chunk_data)
+            chunk_index += 1
+            start_char += len(chunk_text)
+            base = totals[end - 1]
+            start = end
         
         return chunks
     
-    def _create_chunk_data(self, text: str, index: int, start_char: int, chunk_type: str) -> Dict[str, Any]:
-        """Create chunk data dictionary with metadata"""
-        
-        word_count = len(text.split())
-        sentence_count = len(self.sentence_endings.split(text))
-        token_count = self._count_tokens(text)
-        
-        has_title = bool(self.section_headers.match(text.split('\n')[0]))
-        section_header = text.split('\n')[0].strip() if has_title else None
-        
-        metadata = ChunkMetadata(
-            chunk_index=index,
-            start_char=start_char,
-            end_char=start_char + len(text),
-            chunk_type=chunk_type,
-            word_count=word_count,
-            sentence_count=sentence_count,
-            has_title=has_title,
-            section_header=section_header
-        )
-        metadata_dict = metadata.__dict__
-        metadata_dict["token_count"] = token_count  # ← Add token count
+    def _create_chunk_data(self, text: str, index: int, start_char: int, chunk_type: str,
+                           word_count: Optional[int] = None,
+                           sentence_count: Optional[int] = None,
+                           token_count: Optional[int] = None) -> Dict[str, Any]:
+        """Create chunk data dictionary with metadata
 
+        Callers that already hold the chunk's word list pass ``word_count``,
+        callers that already know its sentence boundaries pass
+        ``sentence_count``, and callers that packed the chunk on running token
+        totals pass ``token_count``, so the text is not scanned again.
+        """
+        
+        if word_count is None:
+            word_count = len(text.split())
+        if sentence_count is None:
+            sentence_count = len(self.sentence_endings.findall(text)) + 1
+        if token_count is None:
+            token_count = self._count_tokens(text)
+        
+        first_line = text.partition('\n')[0]
+        has_title = bool(self.section_headers.match(first_line))
+        section_header = first_line.strip() if has_title else None
+        
         return {
             "text": text.strip(),
-            "metadata": metadata_dict
+            "metadata": {
+                "chunk_index": index,
+                "start_char": start_char,
+                "end_char": start_char + len(text),
+                "chunk_type": chunk_type,
+                "word_count": word_count,
+                "sentence_count": sentence_count,
+                "has_title": has_title,
+                "section_header": section_header,
+                "token_count": token_count,
+            }
         }
     
     def _chunk_structured_document(self, text: str) -> List[Dict[str, Any]]:
@@ -278,44 +409,95 @@ class DocumentChunker:
         logger.debug("Using PDF-style chunking strategy")
         return self._chunk_generic_text(text)
     
-    def _add_overlap_and_validate(self, chunks: List[Dict[str, Any]], original_text: str) -> List[Dict[str, Any]]:
+    def _add_overlap_and_validate(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Add overlap between chunks and validate results"""
-        logger.debug(f"Adding overlap and validating {len(chunks)} chunks")
+        logger.debug("Adding overlap and validating %d chunks", len(chunks))
         
         if not chunks or self.chunk_overlap <= 0:
             return self._filter_valid_chunks(chunks)
         
-        final_chunks = []
+        # Chunks are updated in place; remember each chunk's text from before
+        # its own overlap was prepended so overlap never compounds
+        tail_starts = self._overlap_tail_starts([chunk["text"] for chunk in chunks])
+        prev_chunk_text = None
+        prev_tail_start = 0
         
-        for i, chunk in enumerate(chunks):
+        for chunk, tail_start in zip(chunks, tail_starts):
             chunk_text = chunk["text"]
+            has_overlap = False
             
-            if i > 0 and self.chunk_overlap > 0:
-                prev_chunk_text = chunks[i-1]["text"]
-                overlap_text = prev_chunk_text[-self.chunk_overlap:].strip()
+            if prev_chunk_text is not None:
+                overlap_text = prev_chunk_text[prev_tail_start:].strip()
                 overlap_text = self._find_good_overlap(overlap_text)
                 
                 if overlap_text:
-                    chunk_text = overlap_text + " " + chunk_text
+                    chunk["text"] = overlap_text + " " + chunk_text
+                    has_overlap = True
+            
+            chunk["metadata"]["has_overlap"] = has_overlap
+            prev_chunk_text = chunk_text
+            prev_tail_start = tail_start
+        
+        return self._filter_valid_chunks(chunks)
+    
+    def _overlap_tail_starts(self, texts: List[str]) -> List[int]:
+        """Start offset of the overlap window at the end of each text
+
+        With a fast tokenizer the window is the last ``token_overlap`` tokens,
+        widened to the start of the word its first token belongs to; otherwise
+        it is the last ``chunk_overlap`` characters.
+        """
+        if self._backend_tokenizer is None or self.token_overlap <= 0:
+            return [max(0, len(text) - self.chunk_overlap) for text in texts]
+        
+        # Only a character tail of each text is tokenized, cut at a word
+        # boundary so its tokens match the full text's; a tail that yields too
+        # few tokens is doubled until it does or covers the whole text
+        starts = [0] * len(texts)
+        pending = list(range(len(texts)))
+        window = self.token_overlap * _TAIL_CHARS_PER_TOKEN
+        while pending:
+            tail_starts = []
+            for i in pending:
+                tail_start = max(0, len(texts[i]) - window)
+                while tail_start > 0 and not texts[i][tail_start - 1].isspace():
+                    tail_start -= 1
+                tail_starts.append(tail_start)
             
-            updated_chunk = chunk.copy()
-            updated_chunk["text"] = chunk_text
-            updated_chunk["metadata"]["has_overlap"] = i > 0 and self.chunk_overlap > 0
+            encodings = self._backend_tokenizer.encode_batch(
+                [texts[i][tail_start:] for i, tail_start in zip(pending, tail_starts)],
+                add_special_tokens=False
+            )
+            still_pending = []
+            for i, tail_start, encoding in zip(pending, tail_starts, encodings):
+                offsets = encoding.offsets
+                if len(offsets) <= self.token_overlap:
+                    if tail_start > 0:
+                        still_pending.append(i)
+                    continue
+                
+                start = tail_start + offsets[-self.token_overlap][0]
+                while start > 0 and not texts[i][start - 1].isspace():
+                    start -= 1
+                starts[i] = start
             
-            final_chunks.append(updated_chunk)
+            pending = still_pending
+            window *= 2
         
-        return self._filter_valid_chunks(final_chunks)
+        return starts
     
     def _find_good_overlap(self, text: str) -> str:
         """Find a good breaking point for overlap text"""
         if len(text) < 20:
             return ""
         
-        sentences = self.sentence_endings.split(text)
-        if len(sentences) > 1:
-            return sentences[-1].strip()
+        # Preprocessing leaves exactly one space after sentence punctuation,
+        # so the last boundary is the rightmost ". ", "! " or "? "
+        boundary = max(text.rfind('. '), text.rfind('! '), text.rfind('? '))
+        if boundary >= 0:
+            return text[boundary + 2:].strip()
         
-        words = text.split()
+        words = text.rsplit(None, 5)
         if len(words) > 5:
             return " ".join(words[-5:])
         
@@ -324,21 +506,24 @@ class DocumentChunker:
     def _filter_valid_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter out chunks that don't meet quality criteria"""
         valid_chunks = []
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         
         for chunk in chunks:
             text = chunk["text"].strip()
             
             if len(text) < self.min_chunk_length:
-                logger.debug(f"Skipping short chunk: {len(text)} characters")
+                if debug_enabled:
+                    logger.debug("Skipping short chunk: %d characters", len(text))
                 continue
             
-            if len(re.sub(r'[^\w]', '', text)) < 5:
-                logger.debug("Skipping chunk with minimal content")
+            if not _has_word_chars(text, 5):
+                if debug_enabled:
+                    logger.debug("Skipping chunk with minimal content")
                 continue
             
             valid_chunks.append(chunk)
         
-        logger.debug(f"Filtered to {len(valid_chunks)} valid chunks from {len(chunks)} total")
+        logger.debug("Filtered to %d valid chunks from %d total", len(valid_chunks), len(chunks))
         return valid_chunks
 
 
@@ -359,3 +544,21 @@ def chunk_document(text: str, document_type: str = "generic",
     """
     chunker = DocumentChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
     return chunker.chunk_text(text, document_type)
+
+
+def chunk_documents(texts: List[str], document_type: str = "generic",
+                    chunk_size: int = None, chunk_overlap: int = None) -> List[List[Dict[str, Any]]]:
+    """
+    Chunk several documents with one shared chunker
+    
+    Args:
+        texts: Document texts to chunk
+        document_type: Type of the documents (pdf, docx, txt, generic)
+        chunk_size: Override default chunk size
+        chunk_overlap: Override default chunk overlap
+        
+    Returns:
+        One list of chunk dictionaries per input text, in input order
+    """
+    chunker = DocumentChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return [chunker.chunk_text(text, document_type) for text in texts]
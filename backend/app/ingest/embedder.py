@@ -1,6 +1,7 @@
 # backend/app/ingest/embedder.py
 
 import logging
+import threading
 from sentence_transformers import SentenceTransformer, util
 from app.config.settings import settings
 import torch
@@ -9,6 +10,7 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 _model_cache = {}
+_model_lock = threading.Lock()
 
 def get_embedder():
     """
@@ -20,24 +22,56 @@ def get_embedder():
     if model_name in _model_cache:
         return _model_cache[model_name]
 
-    try:
-        model = SentenceTransformer(model_name, device=device)
-        _model_cache[model_name] = model
-        logger.info(f"Embedding model loaded: {model_name} ({device})")
-        return model
-    except Exception as e:
-        logger.exception(f"Failed to load embedding model '{model_name}': {e}")
-        raise
+    # Serialize cold loads so concurrent first requests load the model once
+    with _model_lock:
+        if model_name in _model_cache:
+            return _model_cache[model_name]
+
+        try:
+            model = SentenceTransformer(model_name, device=device)
+            model.eval()
+            for param in model.parameters():
+                param.requires_grad_(False)
+
+            if "cuda" in device:
+                torch.backends.cuda.matmul.allow_tf32 = True
+                model.half()
+                # Warm up kernels and allocator workspaces before the first request
+                model.encode(["warmup"], convert_to_tensor=True, show_progress_bar=False)
+
+            _model_cache[model_name] = model
+            logger.info(f"Embedding model loaded: {model_name} ({device})")
+            return model
+        except Exception as e:
+            logger.exception(f"Failed to load embedding model '{model_name}': {e}")
+            raise
+
+def _encode(model, texts: list[str]):
+    """
+    Encode a batch into L2-normalized embeddings, under fp16 autocast on
+    accelerators
+    """
+    kwargs = dict(
+        batch_size=settings.embedding_batch_size,
+        convert_to_tensor=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    device_type = model.device.type
+
+    with torch.inference_mode():
+        if device_type == "cpu":
+            return model.encode(texts, **kwargs)
+        with torch.autocast(device_type=device_type, dtype=torch.float16):
+            return model.encode(texts, **kwargs).float()
 
 def get_embedding(text: str) -> list[float]:
     model = get_embedder()
-    vec = model.encode([text], convert_to_tensor=True)[0]
-    return torch.nn.functional.normalize(vec, p=2, dim=0).tolist()
+    return _encode(model, [text])[0].tolist()
 
 def get_embeddings(texts: list[str]) -> list:
     model = get_embedder()
-    vecs = model.encode(texts, convert_to_tensor=True)
-    return torch.nn.functional.normalize(vecs, p=2, dim=1)
+    return _encode(model, texts)
 
 def cosine_similarity(vec1, vec2) -> float:
     return float(util.cos_sim(vec1, vec2).item())
\ No newline at end of file
@@ -2,25 +2,94 @@
 
 import logging
 import hashlib
-from typing import List, Dict, Any
-from app.ingest.vector_store import client, embedding_func, get_database_info
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Union
+from app.ingest.vector_store import get_collection, get_database_info
+from app.ingest.retriever import invalidate_context_cache
+from app.core.semantic_cache import invalidate_response_cache
 from app.config.settings import settings
 
+try:
+    import blake3  # optional, used when document_hash_algorithm = "blake3"
+except ImportError:
+    blake3 = None
+
 # ---------------------------
 # Logging Setup
 # ---------------------------
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-def generate_document_hash(content: str) -> str:
-    """Generate SHA-256 hash for document content to detect duplicates"""
-    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+def new_document_hasher():
+    """Create a hasher for the configured document hash algorithm"""
+    if settings.document_hash_algorithm == "blake3":
+        if blake3 is None:
+            raise RuntimeError("document_hash_algorithm is 'blake3' but the blake3 package is not installed")
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.sha256()
+
+def generate_document_hash(content: Union[str, bytes]) -> str:
+    """Generate a hash (SHA-256 or BLAKE3) for document content to detect duplicates"""
+    hasher = new_document_hasher()
+    hasher.update(content.encode('utf-8') if isinstance(content, str) else content)
+    return hasher.hexdigest()
+
+def _hash_chunks(text_chunks: List[str]) -> str:
+    """Hash the concatenation of chunks without building the joined string"""
+    hasher = new_document_hasher()
+    for chunk in text_chunks:
+        hasher.update(chunk.encode('utf-8'))
+    return hasher.hexdigest()
 
 def generate_chunk_id(namespace: str, doc_hash: str, chunk_index: int) -> str:
     """Generate predictable chunk IDs for better tracking"""
     return f"{namespace}_{doc_hash[:8]}_{chunk_index:04d}"
 
-def store_chunks(text_chunks: List[str], namespace: str, document_content: str = "") -> Dict[str, Any]:
+def _add_in_batches(collection, documents: List[str], ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+    """
+    Add records in fixed-size batches on two workers, so one batch is being
+    embedded while another is written. If any batch fails, every ID of this
+    call is deleted again so a document is never left half-indexed.
+    """
+    batch_size = max(1, settings.index_batch_size)
+    
+    if len(ids) <= batch_size:
+        collection.add(documents=documents, ids=ids, metadatas=metadatas)
+        return
+    
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [
+            pool.submit(
+                collection.add,
+                documents=documents[i:i + batch_size],
+                ids=ids[i:i + batch_size],
+                metadatas=metadatas[i:i + batch_size]
+            )
+            for i in range(0, len(ids), batch_size)
+        ]
+        errors = [future.exception() for future in as_completed(futures)]
+    
+    error = next((e for e in errors if e is not None), None)
+    if error is not None:
+        logger.error(f"Batch insert failed, rolling back {len(ids)} chunk IDs: {error}")
+        try:
+            collection.delete(ids=ids)
+        except Exception as cleanup_error:
+            logger.error(f"Rollback after failed batch insert also failed: {cleanup_error}")
+        raise error
+
+def get_existing_chunk_ids(namespace: str, doc_hash: str) -> List[str]:
+    """IDs of the chunks already stored for a document hash; empty if there are none"""
+    collection = get_collection(namespace)
+    # Probe for a single existing chunk with this document hash; only on a hit
+    # are the remaining IDs fetched to report the count
+    probe = collection.get(where={"document_hash": doc_hash}, limit=1, include=[])
+    if not probe.get("ids"):
+        return []
+    return collection.get(where={"document_hash": doc_hash}, include=[]).get("ids", [])
+
+def store_chunks(text_chunks: List[str], namespace: str, document_content: Union[str, bytes] = "",
+                 document_hash: Optional[str] = None) -> Dict[str, Any]:
     """
     Store text chunks in vector database with enhanced metadata tracking
     
@@ -28,6 +97,7 @@ def store_chunks(text_chunks: List[str], namespace: str, document_content: str =
         text_chunks: List of text chunks to store
         namespace: Company/namespace identifier
         document_content: Full document content for hashing (optional)
+        document_hash: Precomputed document hash; skips hashing entirely (optional)
     
     Returns:
         Dictionary with storage results and metadata
@@ -35,26 +105,22 @@ def store_chunks(text_chunks: List[str], namespace: str, document_content: str =
     logger.info(f"Storing {len(text_chunks)} chunk(s) into vector DB | Namespace: '{namespace}'")
     
     # Generate document hash for duplicate detection
-    doc_hash = generate_document_hash(document_content or "".join(text_chunks))
+    if document_hash:
+        doc_hash = document_hash
+    elif document_content:
+        doc_hash = generate_document_hash(document_content)
+    else:
+        doc_hash = _hash_chunks(text_chunks)
     logger.info(f"Document hash: {doc_hash[:16]}...")
     
     try:
         # Create or access collection for the given namespace
-        collection = client.get_or_create_collection(
-            name=namespace,
-            embedding_function=embedding_func,
-            metadata={"hnsw:space": "cosine"}  # optional, just for clarity
-        )
+        collection = get_collection(namespace)
         logger.debug(f"Vector collection '{namespace}' ready")
         
         # Check for existing document by hash
-        existing_chunks = []
         try:
-            # Query for existing chunks with this document hash
-            existing_results = collection.get(
-                where={"document_hash": doc_hash}
-            )
-            existing_chunks = existing_results.get("ids", [])
+            existing_chunks = get_existing_chunk_ids(namespace, doc_hash)
             
             if existing_chunks:
                 logger.warning(f"Found {len(existing_chunks)} existing chunks with same hash. Skipping duplicate upload.")
@@ -81,12 +147,14 @@ def store_chunks(text_chunks: List[str], namespace: str, document_content: str =
                 continue
                 
             chunk_id = generate_chunk_id(namespace, doc_hash, idx)
+            document = chunk.strip()
             chunk_ids.append(chunk_id)
-            documents.append(chunk.strip())
+            documents.append(document)
             metadatas.append({
                 "document_hash": doc_hash,
                 "chunk_index": idx,
                 "chunk_length": len(chunk),
+                "word_count": len(document.split()),  # precomputed for the retriever's ranking
                 "namespace": namespace
             })
             stored_count += 1
@@ -95,11 +163,9 @@ def store_chunks(text_chunks: List[str], namespace: str, document_content: str =
         
         # Batch insert all chunks
         if chunk_ids:
-            collection.add(
-                documents=documents,
-                ids=chunk_ids,
-                metadatas=metadatas
-            )
+            _add_in_batches(collection, documents, chunk_ids, metadatas)
+            invalidate_context_cache(namespace)
+            invalidate_response_cache(namespace)
             logger.info(f"✅ Successfully stored {stored_count} chunks into collection '{namespace}'")
         else:
             logger.warning("No valid chunks to store after filtering")
@@ -127,10 +193,7 @@ def store_chunks(text_chunks: List[str], namespace: str, document_content: str =
 def get_collection_stats(namespace: str) -> Dict[str, Any]:
     """Get statistics about a specific collection"""
     try:
-        collection = client.get_or_create_collection(
-            name=namespace,
-            embedding_function=embedding_func
-        )
+        collection = get_collection(namespace)
         
         count = collection.count()
         
@@ -167,10 +230,7 @@ def delete_document_chunks(namespace: str, document_hash: str) -> Dict[str, Any]
     logger.info(f"Deleting document chunks | Namespace: {namespace} | Hash: {document_hash[:16]}...")
     
     try:
-        collection = client.get_or_create_collection(
-            name=namespace,
-            embedding_function=embedding_func
-        )
+        collection = get_collection(namespace)
         
         # Find all chunks with this document hash
         results = collection.get(
@@ -189,6 +249,8 @@ def delete_document_chunks(namespace: str, document_hash: str) -> Dict[str, Any]
         
         # Delete the chunks
         collection.delete(ids=chunk_ids)
+        invalidate_context_cache(namespace)
+        invalidate_response_cache(namespace)
         
         # Check if collection is empty after deletion
         remaining_count = collection.count()
@@ -214,10 +276,7 @@ def delete_document_chunks(namespace: str, document_hash: str) -> Dict[str, Any]
 def cleanup_empty_collection(namespace: str) -> Dict[str, Any]:
     """Clean up collection if it's empty (optional utility function)"""
     try:
-        collection = client.get_or_create_collection(
-            name=namespace,
-            embedding_function=embedding_func
-        )
+        collection = get_collection(namespace)
         
         count = collection.count()
         
@@ -0,0 +1,154 @@
+# backend/app/ingest/metadata_db.py
+
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+import orjson
+from app.ingest.vector_store import get_data_directories
+
+# ---------------------------
+# Logging Setup
+# ---------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_DB_FILENAME = "documents.sqlite"
+_LEGACY_SUFFIX = "_documents.json"  # per-company JSON files used before the database
+
+_COLUMNS = (
+    "filename",
+    "document_hash",
+    "file_size_bytes",
+    "chunks_stored",
+    "upload_timestamp",
+    "company_id",
+    "original_file_path"
+)
+_SELECT_DOCUMENT = f"SELECT {', '.join(_COLUMNS)} FROM documents"
+_INSERT_DOCUMENT = f"INSERT INTO documents ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    company_id TEXT NOT NULL,
+    document_hash TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    file_size_bytes INTEGER,
+    chunks_stored INTEGER,
+    upload_timestamp TEXT,
+    original_file_path TEXT,
+    PRIMARY KEY (company_id, document_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_company_filename ON documents (company_id, filename);
+"""
+
+# One connection per thread; WAL lets readers run alongside a writer
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
+# ---------------------------
+# Document List Cache
+# ---------------------------
+# Every write goes through this module, so a company's list stays valid until
+# upsert_document or remove_document drops it. The write counter keeps a read
+# that raced with a write from caching what it read before that write.
+_documents_cache: Dict[str, List[Dict[str, Any]]] = {}
+_documents_cache_lock = threading.Lock()
+_write_count = 0
+
+def _invalidate_documents(company_id: str) -> None:
+    global _write_count
+    with _documents_cache_lock:
+        _documents_cache.pop(company_id, None)
+        _write_count += 1
+
+def _open() -> sqlite3.Connection:
+    connection = sqlite3.connect(get_data_directories()["metadata"] / _DB_FILENAME, timeout=30)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+def _row(document: Dict[str, Any]) -> tuple:
+    return tuple(document.get(column) for column in _COLUMNS)
+
+def _import_legacy_json(connection: sqlite3.Connection) -> None:
+    """Import per-company JSON metadata files, then rename them so they are imported once"""
+    for path in get_data_directories()["metadata"].glob(f"*{_LEGACY_SUFFIX}"):
+        company_id = path.name[:-len(_LEGACY_SUFFIX)]
+        try:
+            documents = orjson.loads(path.read_bytes())
+            with connection:
+                connection.executemany(
+                    _INSERT_DOCUMENT.replace("INSERT", "INSERT OR IGNORE", 1),
+                    [
+                        _row({"company_id": company_id, **doc})
+                        for doc in documents
+                        if doc.get("document_hash") and doc.get("filename")
+                    ]
+                )
+            path.rename(path.with_name(path.name + ".imported"))
+            logger.info(f"Imported {len(documents)} document record(s) from {path.name}")
+        except Exception as e:
+            logger.warning(f"Could not import legacy metadata file {path.name}: {e}")
+
+def _connection() -> sqlite3.Connection:
+    """This thread's connection, creating the schema (and importing legacy files) on first use"""
+    global _initialized
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        connection = _local.connection = _open()
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                connection.executescript(_SCHEMA)
+                _import_legacy_json(connection)
+                _initialized = True
+    return connection
+
+def upsert_document(document: Dict[str, Any]) -> None:
+    """Store a document record, replacing any record of the company with the same filename or hash"""
+    connection = _connection()
+    with connection:
+        connection.execute(
+            "DELETE FROM documents WHERE company_id = ? AND (filename = ? OR document_hash = ?)",
+            (document["company_id"], document["filename"], document["document_hash"])
+        )
+        connection.execute(_INSERT_DOCUMENT, _row(document))
+    _invalidate_documents(document["company_id"])
+
+def list_documents(company_id: str) -> List[Dict[str, Any]]:
+    """A company's document records, oldest upload first (cached until the next write)"""
+    with _documents_cache_lock:
+        documents = _documents_cache.get(company_id)
+        write_count = _write_count
+    if documents is None:
+        rows = _connection().execute(f"{_SELECT_DOCUMENT} WHERE company_id = ? ORDER BY rowid", (company_id,))
+        documents = [dict(row) for row in rows]
+        with _documents_cache_lock:
+            if write_count == _write_count:
+                _documents_cache[company_id] = documents
+    return list(documents)
+
+def find_document_by_filename(company_id: str, filename: str) -> Optional[Dict[str, Any]]:
+    """A company's document record by filename, if any"""
+    row = _connection().execute(
+        f"{_SELECT_DOCUMENT} WHERE company_id = ? AND filename = ?", (company_id, filename)
+    ).fetchone()
+    return dict(row) if row is not None else None
+
+def remove_document(company_id: str, document_hash: str) -> Optional[Dict[str, Any]]:
+    """Delete a document record and return it, or None if there was none"""
+    connection = _connection()
+    with connection:
+        row = connection.execute(
+            f"{_SELECT_DOCUMENT} WHERE company_id = ? AND document_hash = ?", (company_id, document_hash)
+        ).fetchone()
+        if row is None:
+            return None
+        connection.execute(
+            "DELETE FROM documents WHERE company_id = ? AND document_hash = ?", (company_id, document_hash)
+        )
+    _invalidate_documents(company_id)
+    return dict(row)
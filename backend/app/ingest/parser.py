@@ -1,17 +1,61 @@
 # backend/app/ingest/parser.py
 
+import io
+import mmap
 import fitz
 import docx
 from pathlib import Path
 
+_MMAP_MIN_BYTES = 1024 * 1024  # .txt files at least this large are memory-mapped
+
+# WordprocessingML run content, read straight from the XML
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_T = f"{_W}t"
+_W_BR = f"{_W}br"
+_W_BR_TYPE = f"{_W}type"
+_DOCX_RUN_CHARS = {f"{_W}tab": "\t", f"{_W}ptab": "\t", f"{_W}cr": "\n", f"{_W}noBreakHyphen": "-"}
+
+def _docx_paragraph_text(p) -> str:
+    """Paragraph text from its runs' XML, following python-docx's Paragraph.text rules"""
+    parts = []
+    for el in p.xpath("./w:r/* | ./w:hyperlink/w:r/*"):
+        tag = el.tag
+        if tag == _W_T:
+            parts.append(el.text or "")
+        elif tag == _W_BR:
+            if el.get(_W_BR_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            char = _DOCX_RUN_CHARS.get(tag)
+            if char:
+                parts.append(char)
+    return "".join(parts)
+
 def load_file_text(file_path: Path) -> str:
     if file_path.suffix == ".pdf":
-        doc = fitz.open(file_path)
-        return " ".join(page.get_text() for page in doc)
+        # Write pages straight into one buffer instead of joining page strings,
+        # and close the document as soon as extraction is done
+        buf = io.StringIO()
+        with fitz.open(file_path) as doc:
+            for page_number, page in enumerate(doc):
+                if page_number:
+                    buf.write(" ")
+                buf.write(page.get_text("text", sort=False))
+        return buf.getvalue()
     elif file_path.suffix == ".docx":
         doc = docx.Document(file_path)
-        return " ".join(p.text for p in doc.paragraphs)
+        body = doc.element.body
+        return " ".join(_docx_paragraph_text(p) for p in body.xpath("./w:p"))
     elif file_path.suffix == ".txt":
-        return file_path.read_text()
+        # Large files are decoded straight from a memory map, skipping the
+        # intermediate bytes copy; small ones are not worth the mapping
+        if file_path.stat().st_size < _MMAP_MIN_BYTES:
+            return file_path.read_text(encoding="utf-8", errors="replace")
+        with file_path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = str(mm, "utf-8", "replace")
+        # Match read_text's universal newline handling
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
     else:
         raise ValueError("Unsupported file type")
\ No newline at end of file
@@ -1,9 +1,10 @@
 # backend/app/ingest/quality.py
 
 import logging
+from itertools import islice
 from typing import List, Dict
 from app.config.settings import settings
-from app.ingest.embedder import get_embeddings, cosine_similarity
+from app.ingest.embedder import get_embeddings
 
 logger = logging.getLogger(__name__)
 
@@ -21,16 +22,21 @@ def score_chunk_quality(chunks: List[Dict]) -> List[Dict]:
     texts = [chunk["text"] for chunk in chunks]
     embeddings = get_embeddings(texts)
 
-    for i in range(1, len(chunks)):
-        score = cosine_similarity(embeddings[i - 1], embeddings[i])
-        chunks[i]["metadata"]["chunk_quality_score"] = round(score, 4)
+    # Embeddings are L2-normalized, so every adjacent cosine similarity is a
+    # row-wise dot product; compute them all at once and sync to host once
+    scores = (embeddings[:-1] * embeddings[1:]).sum(dim=1).cpu().tolist()
+
+    # The remaining per-chunk work is writing two metadata fields, so each
+    # chunk's metadata dict is looked up once and the threshold read once
+    threshold = settings.quality_score_threshold
+    for i, (chunk, score) in enumerate(zip(islice(chunks, 1, None), scores), start=1):
+        metadata = chunk["metadata"]
+        metadata["chunk_quality_score"] = round(score, 4)
 
         # Optionally flag poor coherence
-        if score < settings.quality_score_threshold:
-            chunks[i]["metadata"]["low_quality_flag"] = True
+        metadata["low_quality_flag"] = low_quality = score < threshold
+        if low_quality:
             logger.debug(f"Chunk {i} has low quality score: {score:.4f}")
-        else:
-            chunks[i]["metadata"]["low_quality_flag"] = False
 
     # First chunk has no previous comparison
     chunks[0]["metadata"]["chunk_quality_score"] = None
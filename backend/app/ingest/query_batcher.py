@@ -0,0 +1,87 @@
+# backend/app/ingest/query_batcher.py
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Tuple
+from app.config.settings import settings
+from app.ingest.vector_store import embedding_func
+
+# ---------------------------
+# Logging Setup
+# ---------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+class QueryEmbeddingBatcher:
+    """
+    Embeds query texts from concurrent requests together. A single worker
+    thread runs the embedding function; queries that arrive while it is busy
+    (or within the batch window) share its next forward pass.
+    """
+
+    def __init__(self, max_batch_size: int, window_ms: float):
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def embed(self, text: str):
+        """Embed one query text, blocking until its batch has been encoded"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _ensure_worker(self) -> None:
+        """Start the worker thread on first use"""
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="query-embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _next_batch(self) -> list:
+        """Wait for one query, then collect what else is queued or arrives within the window"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                embeddings = embedding_func([text for text, _ in batch])
+            except Exception as e:
+                logger.exception(f"Query embedding batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            if len(batch) > 1:
+                logger.debug(f"Embedded {len(batch)} queries in one batch")
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+_batcher = QueryEmbeddingBatcher(
+    max_batch_size=settings.query_embedding_batch_size,
+    window_ms=settings.query_embedding_batch_window_ms
+)
+
+def embed_query(text: str):
+    """Embed a query for vector search, batched with concurrent queries"""
+    return _batcher.embed(text)
@@ -1,11 +1,18 @@
 # backend/app/ingest/retriever.py
 
+import heapq
 import logging
 import re
+import threading
 import time
+from itertools import repeat
 from typing import List, Dict, Any, Optional, Tuple
+from cachetools import TTLCache
 from app.config.settings import settings
-from app.ingest.vector_store import client, embedding_func
+from app.ingest.vector_store import get_collection
+from app.ingest.query_batcher import embed_query
+from app.core.semantic_cache import SemanticCache
+from app.llm.tokenizer import get_tokenizer
 
 # ---------------------------
 # Logging Setup
@@ -13,6 +20,80 @@ from app.ingest.vector_store import client, embedding_func
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# ---------------------------
+# Query Cleaning Patterns
+# ---------------------------
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_WS_RE = re.compile(r'\s+')
+_MAX_KEY_PHRASE_CHARS = 64  # longer key phrases skip the exact-phrase check
+
+# ---------------------------
+# Query Intent Patterns
+# ---------------------------
+# Keywords per intent in precedence order; a keyword matches anywhere in the
+# lowercased query, as a plain substring
+_INTENT_KEYWORDS = (
+    ("question", ("how", "what", "when", "where", "why", "who")),
+    ("instruction", ("how to", "steps", "process", "procedure", "instruction")),
+    ("definition", ("what is", "define", "definition", "meaning")),
+    ("troubleshooting", ("error", "problem", "issue", "fix", "solve", "troubleshoot")),
+)
+# One anchored lookahead per intent, tried in order, so a single match
+# call returns the first intent in precedence order that has any keyword
+_INTENT_RE = re.compile(
+    "|".join(
+        f"(?P<{intent}>(?=.*?(?:{'|'.join(map(re.escape, keywords))})))"
+        for intent, keywords in _INTENT_KEYWORDS
+    ),
+    re.DOTALL
+)
+
+# ---------------------------
+# Ranking Weights
+# ---------------------------
+_VECTOR_WEIGHT = 0.6  # 60% weight on vector similarity
+_KEYWORD_WEIGHT = 0.3  # 30% weight on keyword relevance
+_TITLE_BONUS = 0.1  # titled chunks, for definition/information queries
+_CHUNK_TYPE_BONUS = {"paragraph": 0.05, "sentence_group": 0.02}
+_SHORT_CHUNK_WORDS = 20  # chunks below this many words are penalized
+_SHORT_CHUNK_PENALTY = 0.1
+_LONG_CHUNK_WORDS = 100  # chunks above this many words get a bonus for complex queries
+_LONG_CHUNK_BONUS = 0.05
+
+# ---------------------------
+# Retrieval Cache
+# ---------------------------
+# Formatted context keyed by (namespace, expanded query, top_k). Entries expire
+# after cache_ttl_minutes and are dropped as soon as a namespace's documents
+# change (see invalidate_context_cache).
+_CONTEXT_CACHE_SIZE = 1024
+_context_cache = (
+    TTLCache(maxsize=_CONTEXT_CACHE_SIZE, ttl=settings.cache_ttl_minutes * 60)
+    if settings.enable_caching else None
+)
+_context_cache_lock = threading.Lock()
+
+# Behind the exact map, contexts are also found by query embedding similarity,
+# so rephrasings of a recent query skip the vector search and ranking
+_semantic_context_cache = (
+    SemanticCache(
+        threshold=settings.semantic_context_threshold,
+        max_entries=_CONTEXT_CACHE_SIZE,
+        ttl_seconds=settings.cache_ttl_minutes * 60,
+        name="contexts"
+    )
+    if settings.enable_caching else None
+)
+
+def invalidate_context_cache(namespace: str) -> None:
+    """Drop cached contexts for a namespace after its documents change"""
+    if _context_cache is None:
+        return
+    with _context_cache_lock:
+        for key in [key for key in _context_cache if key[0] == namespace]:
+            _context_cache.pop(key, None)
+    _semantic_context_cache.invalidate(namespace)
+
 class QueryProcessor:
     """Handles query preprocessing and expansion"""
     
@@ -52,8 +133,8 @@ class QueryProcessor:
         processed_query = original_query.lower()
         
         # Basic cleaning
-        processed_query = re.sub(r'[^\w\s]', ' ', processed_query)
-        processed_query = re.sub(r'\s+', ' ', processed_query).strip()
+        processed_query = _PUNCT_RE.sub(' ', processed_query)
+        processed_query = _WS_RE.sub(' ', processed_query).strip()
         
         # Expand abbreviations
         expanded_terms = []
@@ -69,6 +150,15 @@ class QueryProcessor:
         # Extract key terms (remove stop words for keyword matching)
         key_terms = [word for word in expanded_query.split() if word not in self.stop_words and len(word) > 2]
         
+        # The exact-phrase boost uses the terms as written; single terms and
+        # phrases too long to plausibly appear verbatim are not checked
+        key_phrase = " ".join(key_terms) if len(key_terms) > 1 else None
+        if key_phrase is not None and len(key_phrase) > _MAX_KEY_PHRASE_CHARS:
+            key_phrase = None
+        
+        # Each distinct term is matched once (order preserved)
+        key_terms = list(dict.fromkeys(key_terms))
+        
         # Detect query type/intent
         query_intent = self._detect_query_intent(original_query)
         
@@ -77,6 +167,7 @@ class QueryProcessor:
             "processed": processed_query,
             "expanded": expanded_query,
             "key_terms": key_terms,
+            "key_phrase": key_phrase,
             "intent": query_intent,
             "length": len(original_query.split())
         }
@@ -86,23 +177,9 @@ class QueryProcessor:
     
     def _detect_query_intent(self, query: str) -> str:
         """Detect the intent/type of the query"""
-        query_lower = query.lower()
-        
-        # Question patterns
-        if any(word in query_lower for word in ["how", "what", "when", "where", "why", "who"]):
-            return "question"
-        
-        # Instruction/procedure seeking
-        if any(word in query_lower for word in ["how to", "steps", "process", "procedure", "instruction"]):
-            return "instruction"
-        
-        # Definition seeking
-        if any(word in query_lower for word in ["what is", "define", "definition", "meaning"]):
-            return "definition"
-        
-        # Troubleshooting
-        if any(word in query_lower for word in ["error", "problem", "issue", "fix", "solve", "troubleshoot"]):
-            return "troubleshooting"
+        match = _INTENT_RE.match(query.lower())
+        if match:
+            return match.lastgroup
         
         # General information
         return "information"
@@ -112,14 +189,28 @@ class ContextRetriever:
     
     def __init__(self):
         self.query_processor = QueryProcessor()
+        
+        # Context is trimmed by token count through a fast tokenizer's offsets,
+        # so the kept text is the original (not re-decoded) text
+        tokenizer = get_tokenizer()
+        self._context_tokenizer = (
+            tokenizer.backend_tokenizer
+            if tokenizer and getattr(tokenizer, "is_fast", False)
+            else None
+        )
     
-    def retrieve_context(self, query: str, namespace: str) -> str:
+    def embed_query(self, query: str):
+        """Embed a query the way retrieval searches with it (its expanded form)"""
+        return embed_query(self.query_processor.preprocess_query(query)["expanded"])
+    
+    def retrieve_context(self, query: str, namespace: str, query_embedding=None) -> str:
         """
         Enhanced context retrieval with intelligent processing
         
         Args:
             query: User query
             namespace: Company namespace
+            query_embedding: Embedding from embed_query, if the caller already has it
             
         Returns:
             Formatted context string
@@ -130,19 +221,36 @@ class ContextRetriever:
             # Process the query
             query_data = self.query_processor.preprocess_query(query)
             
+            cache_key = (namespace, query_data["expanded"], settings.retrieval_top_k)
+            if _context_cache is not None:
+                with _context_cache_lock:
+                    cached_context = _context_cache.get(cache_key)
+                if cached_context is not None:
+                    logger.info(f"Context cache hit | Namespace: {namespace}")
+                    return cached_context
+            
+            # The query embedding serves both the semantic cache and the vector search
+            if query_embedding is None:
+                query_embedding = embed_query(query_data["expanded"])
+            
+            if _semantic_context_cache is not None:
+                cached_context = _semantic_context_cache.get(namespace, query_embedding)
+                if cached_context is not None:
+                    logger.info(f"Semantic context cache hit | Namespace: {namespace} | "
+                                f"Hits: {_semantic_context_cache.hits} | Misses: {_semantic_context_cache.misses}")
+                    self._cache_context(cache_key, cached_context)
+                    return cached_context
+            
             # Get collection
-            collection = client.get_or_create_collection(
-                name=namespace,
-                embedding_function=embedding_func,
-                metadata={"hnsw:space": "cosine"}  # optional, just for clarity
-            )
+            collection = get_collection(namespace)
             logger.debug(f"Vector collection '{namespace}' loaded")
             
             # Retrieve relevant chunks
-            retrieved_chunks = self._retrieve_relevant_chunks(collection, query_data)
+            retrieved_chunks = self._retrieve_relevant_chunks(collection, query_data, query_embedding)
             
             if not retrieved_chunks:
                 logger.warning(f"No relevant chunks found for query: '{query}'")
+                self._cache_context(cache_key, "")
                 return ""
             
             # Rank and select best chunks
@@ -152,62 +260,77 @@ class ContextRetriever:
             formatted_context = self._format_context(ranked_chunks, query_data)
             
             logger.info(f"Context retrieval completed | Chunks used: {len(ranked_chunks)} | Context length: {len(formatted_context)}")
+            self._cache_context(cache_key, formatted_context)
+            if _semantic_context_cache is not None:
+                _semantic_context_cache.put(namespace, query_embedding, formatted_context)
             return formatted_context
             
         except Exception as e:
             logger.exception(f"Error during context retrieval for query: '{query}' in namespace: '{namespace}'")
             return ""
     
-    def _retrieve_relevant_chunks(self, collection, query_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _cache_context(self, cache_key: Tuple[str, str, int], context: str) -> None:
+        """Remember a successfully built context; failures are never cached"""
+        if _context_cache is not None:
+            with _context_cache_lock:
+                _context_cache[cache_key] = context
+    
+    def _retrieve_relevant_chunks(self, collection, query_data: Dict[str, Any],
+                                  query_embedding) -> List[Dict[str, Any]]:
         """Retrieve potentially relevant chunks using multiple strategies"""
         
         start = time.perf_counter()
-        # Primary vector search with expanded query
+        # Primary vector search with the expanded query's embedding, computed
+        # by the caller through the shared batcher
         vector_results = collection.query(
-            query_texts=[query_data["expanded"]],
+            query_embeddings=[query_embedding],
             n_results=min(settings.retrieval_top_k * 2, 20),  # Get more candidates for ranking
             include=["documents", "metadatas", "distances"]
         )
         elapsed = time.perf_counter() - start
-        logger.info(f"Vector search completed in {elapsed:.3f}s | Results: {len(vector_results.get('documents', [[]])[0])}")
+        documents = (vector_results.get("documents") or [[]])[0]
+        logger.info(f"Vector search completed in {elapsed:.3f}s | Results: {len(documents)}")
         chunks = []
         
-        if vector_results.get("documents") and vector_results["documents"][0]:
-            documents = vector_results["documents"][0]
-            metadatas = vector_results.get("metadatas", [[]])[0]
+        if documents:
+            # Chroma returns one row list per query text; only row 0 is used
+            metadatas = vector_results["metadatas"][0] if vector_results.get("metadatas") else None
             distances = vector_results.get("distances", [[]])[0]
-            
-            for i, (doc, metadata, distance) in enumerate(zip(documents, metadatas or [{}] * len(documents), distances)):
-                chunk_data = {
+            chunks = [
+                {
                     "text": doc,
                     "metadata": metadata or {},
                     "vector_distance": distance,
                     "vector_rank": i,
                     "retrieval_method": "vector"
                 }
-                chunks.append(chunk_data)
+                for i, (doc, metadata, distance) in enumerate(zip(documents, metadatas or repeat(None), distances))
+            ]
         
         # Keyword-based filtering for additional relevance
         if query_data["key_terms"]:
-            chunks = self._apply_keyword_filtering(chunks, query_data["key_terms"])
+            chunks = self._apply_keyword_filtering(chunks, query_data["key_terms"], query_data["key_phrase"])
         
         logger.debug(f"Retrieved {len(chunks)} candidate chunks")
         return chunks
     
-    def _apply_keyword_filtering(self, chunks: List[Dict[str, Any]], key_terms: List[str]) -> List[Dict[str, Any]]:
+    def _apply_keyword_filtering(self, chunks: List[Dict[str, Any]], key_terms: List[str],
+                                 phrase: Optional[str] = None) -> List[Dict[str, Any]]:
         """Apply keyword-based filtering and scoring"""
         
+        # Query-level invariants are computed once, outside the chunk loop
+        term_total = len(key_terms)
+        
         for chunk in chunks:
             text_lower = chunk["text"].lower()
             
             # Count keyword matches
             keyword_matches = sum(1 for term in key_terms if term in text_lower)
             chunk["keyword_matches"] = keyword_matches
-            chunk["keyword_score"] = keyword_matches / len(key_terms) if key_terms else 0
+            chunk["keyword_score"] = keyword_matches / term_total if term_total else 0
             
             # Boost score for exact phrase matches
-            if len(key_terms) > 1:
-                phrase = " ".join(key_terms)
+            if phrase is not None:
                 if phrase in text_lower:
                     chunk["has_exact_phrase"] = True
                     chunk["keyword_score"] += 0.3
@@ -230,48 +353,49 @@ class ContextRetriever:
         if not chunks:
             return []
         
+        # Query-level factors are the same for every chunk, so the bonuses they
+        # gate are resolved once and the weights are bound as locals
+        title_bonus = _TITLE_BONUS if query_data["intent"] in ("definition", "information") else 0.0
+        long_chunk_bonus = _LONG_CHUNK_BONUS if query_data["length"] > 5 else 0.0
+        vector_weight = _VECTOR_WEIGHT
+        keyword_weight = _KEYWORD_WEIGHT
+        chunk_type_bonus = _CHUNK_TYPE_BONUS
+        short_chunk_words = _SHORT_CHUNK_WORDS
+        short_chunk_penalty = _SHORT_CHUNK_PENALTY
+        long_chunk_words = _LONG_CHUNK_WORDS
+        
         # Calculate composite relevance scores
         for chunk in chunks:
-            score = 0.0
-            
-            # Vector similarity (lower distance = higher relevance)
-            vector_score = max(0, 1 - chunk.get("vector_distance", 1))
-            score += vector_score * 0.6  # 60% weight
-            
-            # Keyword relevance
-            keyword_score = chunk.get("keyword_score", 0)
-            score += keyword_score * 0.3  # 30% weight
+            # Vector similarity (lower distance = higher relevance) and keyword relevance
+            score = (max(0, 1 - chunk.get("vector_distance", 1)) * vector_weight
+                     + chunk.get("keyword_score", 0) * keyword_weight)
             
             # Metadata-based scoring
-            metadata = chunk.get("metadata", {})
+            metadata = chunk.get("metadata") or {}
             
             # Prefer chunks with titles/headers for certain query types
-            if query_data["intent"] in ["definition", "information"] and metadata.get("has_title"):
-                score += 0.1
+            if metadata.get("has_title"):
+                score += title_bonus
             
             # Prefer paragraph chunks over sentence fragments
-            chunk_type = metadata.get("chunk_type", "")
-            if chunk_type == "paragraph":
-                score += 0.05
-            elif chunk_type == "sentence_group":
-                score += 0.02
+            score += chunk_type_bonus.get(metadata.get("chunk_type"), 0.0)
             
-            # Penalize very short chunks
-            word_count = metadata.get("word_count", len(chunk["text"].split()))
-            if word_count < 20:
-                score -= 0.1
-            
-            # Boost longer, more comprehensive chunks for complex queries
-            if query_data["length"] > 5 and word_count > 100:
-                score += 0.05
+            # Penalize very short chunks and boost longer, more comprehensive
+            # chunks for complex queries; word_count is stored at ingest, older
+            # chunks without it are counted here
+            word_count = metadata.get("word_count")
+            if word_count is None:
+                word_count = len(chunk["text"].split())
+            if word_count < short_chunk_words:
+                score -= short_chunk_penalty
+            elif word_count > long_chunk_words:
+                score += long_chunk_bonus
             
             chunk["relevance_score"] = score
         
-        # Sort by relevance score (descending)
-        ranked_chunks = sorted(chunks, key=lambda x: x["relevance_score"], reverse=True)
-        
-        # Take top N chunks based on settings
-        top_chunks = ranked_chunks[:settings.retrieval_top_k]
+        # Take the top N chunks by relevance score (descending); nlargest keeps
+        # the same order as a stable reverse sort without sorting the rest
+        top_chunks = heapq.nlargest(settings.retrieval_top_k, chunks, key=lambda x: x["relevance_score"])
         
         logger.debug(f"Ranked chunks: top {len(top_chunks)} selected")
         for i, chunk in enumerate(top_chunks[:3]):  # Log top 3 for debugging
@@ -315,8 +439,21 @@ class ContextRetriever:
         
         context = "\n".join(context_parts)
         
-        # Trim if too long (safety check)
-        max_context_length = 4000  # Reasonable limit for most LLMs
+        return self._trim_context(context)
+    
+    def _trim_context(self, context: str) -> str:
+        """Trim context to the LLM token budget (safety check)"""
+        max_tokens = max(1, settings.max_context_tokens)
+        
+        if self._context_tokenizer is not None:
+            offsets = self._context_tokenizer.encode(context, add_special_tokens=False).offsets
+            if len(offsets) > max_tokens:
+                context = context[:offsets[max_tokens - 1][1]] + "\n[...content truncated for length...]"
+                logger.warning(f"Context truncated to {max_tokens} tokens")
+            return context
+        
+        # Without a fast tokenizer, fall back to ~4 characters per token
+        max_context_length = max_tokens * 4
         if len(context) > max_context_length:
             context = context[:max_context_length] + "\n[...content truncated for length...]"
             logger.warning(f"Context truncated to {max_context_length} characters")
@@ -326,15 +463,20 @@ class ContextRetriever:
 # Create global instance for easy import
 _retriever_instance = ContextRetriever()
 
-def retrieve_context(query: str, namespace: str) -> str:
+def retrieve_context(query: str, namespace: str, query_embedding=None) -> str:
     """
     Main function for context retrieval - maintains backward compatibility
     
     Args:
         query: User query
         namespace: Company namespace
+        query_embedding: Embedding from embed_retrieval_query, if already computed
         
     Returns:
         Formatted context string
     """
-    return _retriever_instance.retrieve_context(query, namespace)
\ No newline at end of file
+    return _retriever_instance.retrieve_context(query, namespace, query_embedding)
+
+def embed_retrieval_query(query: str):
+    """Embed a query exactly as retrieve_context would, so the embedding can be shared"""
+    return _retriever_instance.embed_query(query)
\ No newline at end of file
@@ -2,7 +2,9 @@
 
 import logging
 import os
+import threading
 from pathlib import Path
+from app.config.settings import settings
 
 # ---------------------------
 # Logging Setup
@@ -42,9 +44,33 @@ try:
     )
     logger.info(f"ChromaDB persistent client initialized at: {CHROMA_DB_DIR}")
 
-    # Set up embedding function
-    embedding_func = SentenceTransformerEmbeddingFunction()
-    logger.info("SentenceTransformerEmbeddingFunction loaded")
+    # ---------------------------
+    # Embedding Function
+    # ---------------------------
+    def _pick_device() -> str:
+        """Resolve the vector store embedding device, preferring an accelerator"""
+        device = settings.vector_embedding_device
+        if device != "auto":
+            return device
+
+        import torch
+        if torch.cuda.is_available():
+            return "cuda"
+        if torch.backends.mps.is_available():
+            return "mps"
+        return "cpu"
+
+    embedding_device = _pick_device()
+    embedding_func = SentenceTransformerEmbeddingFunction(
+        model_name=settings.vector_embedding_model,
+        device=embedding_device
+    )
+    logger.info(f"SentenceTransformerEmbeddingFunction loaded: {settings.vector_embedding_model} ({embedding_device})")
+
+    def warmup_embedding_func():
+        """Run one dummy embedding so the first real query does not pay for model setup"""
+        embedding_func(["warmup"])
+        logger.info("Vector store embedding function warmed up")
 
     # ---------------------------
     # Helper Functions for Data Management
@@ -59,6 +85,39 @@ try:
             "metadata": METADATA_DIR
         }
 
+    def get_collection_metadata():
+        """Collection metadata (distance space and HNSW tuning) used when a namespace is created"""
+        return {
+            "hnsw:space": "cosine",
+            "hnsw:M": settings.hnsw_m,
+            "hnsw:construction_ef": settings.hnsw_construction_ef,
+            "hnsw:search_ef": settings.hnsw_search_ef
+        }
+
+    # ---------------------------
+    # Collection Handle Cache
+    # ---------------------------
+    _collection_cache = {}
+    _collection_lock = threading.Lock()
+
+    def get_collection(namespace: str):
+        """Get or create the collection for a namespace once and reuse the handle"""
+        collection = _collection_cache.get(namespace)
+        if collection is not None:
+            return collection
+
+        with _collection_lock:
+            collection = _collection_cache.get(namespace)
+            if collection is None:
+                collection = client.get_or_create_collection(
+                    name=namespace,
+                    embedding_function=embedding_func,
+                    metadata=get_collection_metadata()
+                )
+                _collection_cache[namespace] = collection
+                logger.debug(f"Collection handle cached for namespace '{namespace}'")
+            return collection
+
     def get_database_info():
         """Get information about the current database state"""
         try:
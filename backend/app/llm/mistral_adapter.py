@@ -5,7 +5,12 @@ import logging
 import socket
 import time
 import json
-from typing import Iterator, Optional
+import re
+import asyncio
+import threading
+import httpx
+import requests
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 from app.config.settings import settings
 
 # ---------------------------
@@ -16,6 +21,64 @@ logger.setLevel(logging.INFO)
 
 OLLAMA_HOST = "127.0.0.1"
 OLLAMA_PORT = 11434
+OLLAMA_BASE_URL = f"http://{OLLAMA_HOST}:{OLLAMA_PORT}"
+OLLAMA_GENERATE_URL = f"{OLLAMA_BASE_URL}/api/generate"
+
+# One keep-alive connection pool to the Ollama HTTP API for all requests
+_session = requests.Session()
+
+# Shared async client for the streaming chat path, created on first use
+_async_client: Optional[httpx.AsyncClient] = None
+
+# Generations in flight are capped at the number Ollama runs in parallel
+# (OLLAMA_NUM_PARALLEL). Ollama batches the concurrent ones on its side; extra
+# requests wait here, in arrival order, instead of piling up on the server.
+# The sync and async paths share this one limiter, so the cap is process-wide.
+_generation_slots = threading.BoundedSemaphore(max(1, settings.llm_max_concurrent_requests))
+
+# A streamed word unit: everything up to and including a boundary character
+_WORD_UNIT_RE = re.compile(r"[^ \n.,!?;:]*[ \n.,!?;:]")
+
+def _split_word_units(pending: str) -> Tuple[List[str], str]:
+    """Split generated text into complete word units and the unfinished remainder"""
+    units = []
+    consumed = 0
+    for match in _WORD_UNIT_RE.finditer(pending):
+        unit = match.group()
+        if unit.strip():
+            units.append(unit)
+        consumed = match.end()
+    return units, pending[consumed:]
+
+async def _acquire_generation_slot() -> None:
+    """Take a generation slot without blocking the event loop"""
+    if _generation_slots.acquire(blocking=False):
+        return
+    acquire = asyncio.ensure_future(asyncio.to_thread(_generation_slots.acquire))
+    try:
+        await asyncio.shield(acquire)
+    except asyncio.CancelledError:
+        # The worker thread still takes the slot; hand it back once it does
+        acquire.add_done_callback(lambda _: _generation_slots.release())
+        raise
+
+def _should_flush(word_buffer: List[str], word: str, buffer_size: int) -> bool:
+    """Flush buffered words when the buffer is full or a sentence ends"""
+    return len(word_buffer) >= buffer_size or word.rstrip().endswith(('.', '!', '?'))
+
+def get_async_client() -> httpx.AsyncClient:
+    """Get the shared async Ollama client, creating it if needed"""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=5.0))
+    return _async_client
+
+async def close_async_client() -> None:
+    """Close the shared async Ollama client"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
 
 def is_ollama_running() -> bool:
     try:
@@ -41,6 +104,51 @@ def start_ollama_server():
     except Exception as e:
         logger.exception(f"Exception while starting Ollama server: {e}")
 
+def ensure_ollama_ready() -> bool:
+    """Start the Ollama server if needed and report whether it is reachable"""
+    if is_ollama_running():
+        return True
+    start_ollama_server()
+    return is_ollama_running()
+
+async def ensure_session() -> bool:
+    """
+    Make sure Ollama is reachable with an open keep-alive connection in the
+    shared async client, so the next generate request skips connection setup.
+    Meant to run concurrently with retrieval.
+    """
+    try:
+        response = await get_async_client().get(OLLAMA_BASE_URL, timeout=httpx.Timeout(5.0))
+        if response.status_code == 200:
+            return True
+    except httpx.HTTPError as e:
+        logger.debug(f"Ollama session check failed, falling back to server start: {e}")
+
+    return await asyncio.to_thread(ensure_ollama_ready)
+
+async def warmup_ollama() -> bool:
+    """
+    Make sure Ollama is up and load the configured model into memory, so the
+    first chat request does not pay for server start or model load
+    """
+    if not await asyncio.to_thread(ensure_ollama_ready):
+        logger.warning("Ollama warm-up skipped: server not available")
+        return False
+
+    try:
+        # A generate request without a prompt only loads the model
+        response = await get_async_client().post(
+            OLLAMA_GENERATE_URL,
+            json={"model": settings.ollama_model},
+            timeout=httpx.Timeout(300.0, connect=5.0)
+        )
+        response.raise_for_status()
+        logger.info(f"Ollama model warmed up: {settings.ollama_model}")
+        return True
+    except Exception as e:
+        logger.warning(f"Ollama warm-up failed: {e}")
+        return False
+
 def query_mistral(prompt: str) -> str:
     """
     Non-streaming version for backward compatibility
@@ -51,27 +159,29 @@ def query_mistral(prompt: str) -> str:
         start_ollama_server()
 
     try:
-        result = subprocess.run(
-            ["ollama", "run", settings.ollama_model, prompt],
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-
-        logger.info(f"Ollama subprocess completed with return code {result.returncode}")
-
-        if result.stderr:
-            logger.warning(f"Ollama stderr:\n{result.stderr.strip()}")
-
-        if not result.stdout.strip():
+        with _generation_slots:
+            result = _session.post(
+                OLLAMA_GENERATE_URL,
+                json={"model": settings.ollama_model, "prompt": prompt, "stream": False},
+                timeout=60
+            )
+        result.raise_for_status()
+        payload = result.json()
+
+        logger.info(f"Ollama request completed with status {result.status_code}")
+
+        if payload.get("error"):
+            logger.warning(f"Ollama error:\n{payload['error']}")
+
+        response = payload.get("response", "").strip()
+        if not response:
             logger.warning("Ollama returned empty response")
 
-        response = result.stdout.strip()
-        logger.debug(f"Ollama stdout (truncated):\n{response[:500]}...")
+        logger.debug(f"Ollama response (truncated):\n{response[:500]}...")
         return response
 
-    except subprocess.TimeoutExpired:
-        logger.error("Ollama subprocess timed out")
+    except requests.Timeout:
+        logger.error("Ollama request timed out")
         return "[Error: LLM model timed out]"
 
     except Exception as e:
@@ -80,7 +190,7 @@ def query_mistral(prompt: str) -> str:
 
 def stream_mistral_response(prompt: str) -> Iterator[str]:
     """
-    Stream responses from Mistral model character-by-character and yield words as they form.
+    Stream responses from Mistral model over the Ollama HTTP API and yield words as they form.
 
     Args:
         prompt: The prompt to send to the model
@@ -90,60 +200,52 @@ def stream_mistral_response(prompt: str) -> Iterator[str]:
     """
     logger.info(f"Starting streaming response from Ollama model: {settings.ollama_model}")
 
-    if not is_ollama_running():
-        start_ollama_server()
-
-        # Wait a bit more to ensure server is ready
-        if not is_ollama_running():
-            yield "[Error: Ollama server not available]"
-            return
+    if not ensure_ollama_ready():
+        yield "[Error: Ollama server not available]"
+        return
 
     try:
-        process = subprocess.Popen(
-            ["ollama", "run", settings.ollama_model, prompt],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
-        )
-
-        logger.info("Ollama streaming process started")
-
-        full_response = ""
-        current_token = ""
-
-        while True:
-            char = process.stdout.read(1)
-
-            if not char:
-                if process.poll() is not None:
+        with _generation_slots, _session.post(
+            OLLAMA_GENERATE_URL,
+            json={"model": settings.ollama_model, "prompt": prompt, "stream": True},
+            stream=True,
+            timeout=(5, 60)
+        ) as response:
+            response.raise_for_status()
+            logger.info("Ollama streaming request started")
+
+            response_length = 0
+            pending = ""
+
+            # Each line is one JSON object carrying the next piece of generated text
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                message = json.loads(line)
+
+                if message.get("error"):
+                    logger.error(f"Ollama streaming failed: {message['error']}")
+                    if pending.strip():
+                        yield pending
+                    yield f"[Error: Process failed - {message['error'][:100]}]"
+                    return
+
+                token = message.get("response", "")
+                if token:
+                    response_length += len(token)
+                    units, pending = _split_word_units(pending + token)
+                    yield from units
+
+                if message.get("done"):
                     break
-                continue
 
-            full_response += char
-            current_token += char
+        if pending.strip():
+            yield pending
 
-            if char in [' ', '\n', '.', ',', '!', '?', ';', ':']:
-                if current_token.strip():
-                    yield current_token
-                current_token = ""
-                time.sleep(0.05)
+        logger.info(f"Streaming completed successfully. Total response length: {response_length}")
 
-        if current_token.strip():
-            yield current_token
-
-        return_code = process.wait(timeout=10)
-        if return_code != 0:
-            stderr_output = process.stderr.read()
-            logger.error(f"Ollama process failed with return code {return_code}: {stderr_output}")
-            yield f"[Error: Process failed - {stderr_output[:100]}]"
-        else:
-            logger.info(f"Streaming completed successfully. Total response length: {len(full_response)}")
-
-    except subprocess.TimeoutExpired:
-        logger.error("Ollama streaming process timed out")
-        process.kill()
+    except requests.Timeout:
+        logger.error("Ollama streaming request timed out")
         yield "[Error: Streaming timeout]"
 
     except Exception as e:
@@ -179,9 +281,7 @@ def stream_mistral_response_buffered(prompt: str, buffer_size: int = 3) -> Itera
             word_buffer.append(word.strip())
             
             # Yield when buffer is full or at sentence endings
-            if (len(word_buffer) >= buffer_size or 
-                any(word.rstrip().endswith(punct) for punct in ['.', '!', '?'])):
-                
+            if _should_flush(word_buffer, word, buffer_size):
                 chunk = " ".join(word_buffer).strip()
                 if chunk:
                     yield chunk + " "
@@ -199,6 +299,76 @@ def stream_mistral_response_buffered(prompt: str, buffer_size: int = 3) -> Itera
             yield " ".join(word_buffer)
         yield f"[Error in buffered streaming: {str(e)}]"
 
+async def astream_mistral_response(prompt: str, check_server: bool = True) -> AsyncIterator[str]:
+    """
+    Async version of stream_mistral_response using the shared httpx client,
+    so many generations can stream concurrently on one event loop.
+
+    Args:
+        prompt: The prompt to send to the model
+        check_server: Verify (and if needed start) the Ollama server first;
+            callers that already awaited ensure_session can skip it
+
+    Yields:
+        str: Individual words or punctuation units as they're generated
+    """
+    logger.info(f"Starting async streaming response from Ollama model: {settings.ollama_model}")
+
+    if check_server and not await asyncio.to_thread(ensure_ollama_ready):
+        yield "[Error: Ollama server not available]"
+        return
+
+    await _acquire_generation_slot()
+    try:
+        async with get_async_client().stream(
+            "POST",
+            OLLAMA_GENERATE_URL,
+            json={"model": settings.ollama_model, "prompt": prompt, "stream": True}
+        ) as response:
+            response.raise_for_status()
+            logger.info("Ollama async streaming request started")
+
+            response_length = 0
+            pending = ""
+
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                message = json.loads(line)
+
+                if message.get("error"):
+                    logger.error(f"Ollama streaming failed: {message['error']}")
+                    if pending.strip():
+                        yield pending
+                    yield f"[Error: Process failed - {message['error'][:100]}]"
+                    return
+
+                token = message.get("response", "")
+                if token:
+                    response_length += len(token)
+                    units, pending = _split_word_units(pending + token)
+                    for unit in units:
+                        yield unit
+
+                if message.get("done"):
+                    break
+
+        if pending.strip():
+            yield pending
+
+        logger.info(f"Async streaming completed successfully. Total response length: {response_length}")
+
+    except httpx.TimeoutException:
+        logger.error("Ollama async streaming request timed out")
+        yield "[Error: Streaming timeout]"
+
+    except Exception as e:
+        logger.exception(f"Error during async streaming: {e}")
+        yield f"[Error during streaming: {str(e)}]"
+
+    finally:
+        _generation_slots.release()
+
 def test_streaming() -> None:
     """
     Test function to verify streaming works correctly
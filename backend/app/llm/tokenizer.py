@@ -8,9 +8,15 @@ logger = logging.getLogger(__name__)
 # You can configure this in settings later
 DEFAULT_TOKENIZER_MODEL = "bert-base-uncased"
 
+_tokenizer_cache = {}
+
 def get_tokenizer(model_name: str = DEFAULT_TOKENIZER_MODEL):
+    if model_name in _tokenizer_cache:
+        return _tokenizer_cache[model_name]
+
     try:
         tokenizer = AutoTokenizer.from_pretrained(model_name)
+        _tokenizer_cache[model_name] = tokenizer
         logger.info(f"Tokenizer loaded: {model_name}")
         return tokenizer
     except Exception as e:
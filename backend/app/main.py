@@ -1,11 +1,16 @@
 # backend/app/main.py
 
 import os
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.chat import chat_router
-from app.routes.upload import upload_router
+from app.routes.upload import upload_router, sweep_incoming_uploads
+from app.llm.mistral_adapter import close_async_client, warmup_ollama
+from app.llm.tokenizer import get_tokenizer
+from app.ingest.vector_store import warmup_embedding_func, get_data_directories
+from app.core.semantic_cache import load_semantic_caches, save_semantic_caches
 
 # ---------------------------
 # Logging Configuration
@@ -49,6 +54,61 @@ try:
     app.include_router(upload_router, prefix="/upload", tags=["Upload"])
     logger.info("Upload router registered at /upload")
 
+    # ---------------------------
+    # Startup / Shutdown Hooks
+    # ---------------------------
+    @app.on_event("startup")
+    async def restore_caches():
+        await asyncio.to_thread(load_semantic_caches, get_data_directories()["data"] / "cache")
+
+    @app.on_event("startup")
+    async def clean_staged_uploads():
+        await asyncio.to_thread(sweep_incoming_uploads)
+
+    @app.on_event("startup")
+    async def warmup_models():
+        # Embedder, tokenizer and LLM warm up concurrently; a failure is
+        # logged and the component loads lazily on first use instead
+        results = await asyncio.gather(
+            asyncio.to_thread(warmup_embedding_func),
+            asyncio.to_thread(get_tokenizer),
+            warmup_ollama(),
+            return_exceptions=True
+        )
+        for name, result in zip(("embedding function", "tokenizer", "Ollama"), results):
+            if isinstance(result, Exception):
+                logger.warning(f"Startup warm-up of {name} failed: {result}")
+        logger.info("Startup warm-up completed")
+
+    @app.on_event("shutdown")
+    async def snapshot_caches():
+        await asyncio.to_thread(save_semantic_caches, get_data_directories()["data"] / "cache")
+
+    @app.on_event("shutdown")
+    async def shutdown_llm_client():
+        await close_async_client()
+        logger.info("Closed async LLM client")
+
 except Exception as e:
     logger.exception(f"Error during app initialization: {e}")
     raise
+
+# ---------------------------
+# Server Entrypoint
+# ---------------------------
+if __name__ == "__main__":
+    import sys
+    import uvicorn
+
+    # uvloop and httptools are the fast event loop and HTTP parser for the
+    # SSE-heavy chat routes; uvloop is not available on Windows. One worker
+    # only: the Chroma persistent store and the in-process caches are not
+    # shared across processes.
+    uvicorn.run(
+        "app.main:app",
+        host="127.0.0.1",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        limit_concurrency=1000
+    )
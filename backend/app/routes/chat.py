@@ -1,14 +1,20 @@
 # backend/app/routes/chat.py
 
+import os
+import time
 import logging
-import json
 import asyncio
-from fastapi import APIRouter
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator
+from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.ingest.retriever import retrieve_context
+from app.ingest.retriever import retrieve_context, embed_retrieval_query
+from app.core.semantic_cache import response_cache
 from app.core.prompt import build_prompt
-from app.llm.mistral_adapter import query_mistral, stream_mistral_response_buffered
+from app.config.settings import settings
+from app.llm.mistral_adapter import query_mistral, astream_mistral_response, ensure_session
 
 # ---------------------------
 # Logging Setup
@@ -16,7 +22,42 @@ from app.llm.mistral_adapter import query_mistral, stream_mistral_response_buffe
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-chat_router = APIRouter()                                                                                                                                                                                                                                                                                                                                                                                                        
+chat_router = APIRouter()
+
+# Response headers for every SSE endpoint; X-Accel-Buffering stops nginx-style
+# reverse proxies from holding events back
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
+
+_SSE_ESCAPE = str.maketrans({"\n": "\\n", "\r": "\\r"})  # newline escapes for plain SSE data
+_YIELD_EVERY_CHUNKS = 16  # streamed chunks between cooperative event loop yields
+
+# Retrieval (query embedding, vector search, ranking) is CPU-bound and runs on
+# its own pool, keeping the event loop free for streaming LLM responses
+_retrieval_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="retrieval")
+
+async def retrieve_context_async(message: str, company_id: str, query_embedding=None) -> str:
+    """Run retrieve_context on the retrieval pool, reusing the message embedding when there is one"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_retrieval_pool, retrieve_context, message, company_id, query_embedding)
+
+async def embed_message_for_cache(message: str):
+    """
+    Embed a message for the response cache; None when caching is off or
+    embedding fails. The embedding is the one retrieval searches with, so a
+    cache miss passes it on instead of embedding the message again.
+    """
+    if response_cache is None:
+        return None
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_retrieval_pool, embed_retrieval_query, message)
+    except Exception as e:
+        logger.warning("Response cache skipped, message embedding failed: %s", e)
+        return None
 
 class ChatRequest(BaseModel):
     message: str
@@ -27,7 +68,7 @@ class StreamingChatRequest(BaseModel):
     message: str
     company_id: str
 
-def format_sse_message(data: str, event_type: str = "message") -> str:
+def format_sse_message(data: str, event_type: str = "message") -> bytes:
     """
     Format message for Server-Sent Events
     
@@ -36,14 +77,12 @@ def format_sse_message(data: str, event_type: str = "message") -> str:
         event_type: Type of event (message, error, done)
         
     Returns:
-        Formatted SSE string
+        Formatted SSE frame as UTF-8 bytes
     """
-    # Escape newlines in data for SSE format
-    cleaned_data = data.replace('\n', '\\n').replace('\r', '\\r')
-    
-    return f"event: {event_type}\ndata: {cleaned_data}\n\n"
+    # Escape newlines in data for SSE format, in a single pass
+    return f"event: {event_type}\ndata: {data.translate(_SSE_ESCAPE)}\n\n".encode()
 
-def format_sse_json(data: dict, event_type: str = "message") -> str:
+def format_sse_json(data: dict, event_type: str = "message") -> bytes:
     """
     Format JSON data for Server-Sent Events
     
@@ -52,80 +91,236 @@ def format_sse_json(data: dict, event_type: str = "message") -> str:
         event_type: Type of event
         
     Returns:
-        Formatted SSE string
+        Formatted SSE frame as UTF-8 bytes (orjson output is used as-is, so
+        the response does not encode it again)
     """
-    json_data = json.dumps(data)
-    return f"event: {event_type}\ndata: {json_data}\n\n"
+    return b"event: " + event_type.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+# ---------------------------
+# Constant SSE Frames
+# ---------------------------
+_STATUS_RETRIEVING_FRAME = format_sse_json({
+    "type": "status",
+    "message": "Processing your request...",
+    "stage": "retrieving_context"
+}, "status")
+_NO_CONTEXT_WARNING_FRAME = format_sse_json({
+    "type": "warning",
+    "message": "No relevant context found for this query."
+}, "warning")
+_RESPONSE_START_FRAME = format_sse_json({
+    "type": "response_start",
+    "message": "AI is responding..."
+}, "response_start")
+_DONE_FRAME = format_sse_message("DONE", "done")
+_ERROR_DONE_FRAME = format_sse_message("ERROR", "done")
+
+async def coalesce_chunks(units: AsyncIterator[str],
+                          min_chars: int = settings.sse_coalesce_min_chars,
+                          max_delay: float = settings.sse_coalesce_max_delay_ms / 1000) -> AsyncIterator[str]:
+    """
+    Merge adjacent LLM stream units into chunks. A chunk is emitted once it
+    holds min_chars characters or max_delay seconds passed since the last
+    emit, so a slow generation streams unit by unit while bursts share a
+    frame. Held text is flushed by time even while the model pauses. Error
+    units are always emitted on their own.
+    """
+    iterator = units.__aiter__()
+    pending = []
+    pending_chars = 0
+    last_flush = float("-inf")  # the first unit goes out immediately
+    next_unit = None  # task fetching the next unit; kept across timeouts
+    
+    try:
+        while True:
+            if next_unit is None:
+                next_unit = asyncio.ensure_future(iterator.__anext__())
+            
+            if pending:
+                # Wait for the next unit only until the held text is due
+                timeout = max(0.0, last_flush + max_delay - time.monotonic())
+                done, _ = await asyncio.wait((next_unit,), timeout=timeout)
+                if not done:
+                    yield "".join(pending)
+                    pending = []
+                    pending_chars = 0
+                    last_flush = time.monotonic()
+                    continue
+            
+            try:
+                unit = await next_unit
+            except StopAsyncIteration:
+                next_unit = None
+                break
+            next_unit = None
+            
+            if unit.startswith("[Error"):
+                if pending:
+                    yield "".join(pending)
+                    pending = []
+                    pending_chars = 0
+                yield unit
+                continue
+            
+            pending.append(unit)
+            pending_chars += len(unit)
+            now = time.monotonic()
+            if pending_chars >= min_chars or now - last_flush >= max_delay:
+                yield "".join(pending)
+                pending = []
+                pending_chars = 0
+                last_flush = now
+        
+        if pending:
+            yield "".join(pending)
+    
+    finally:
+        # Closed early (client gone or task cancelled): stop the in-flight
+        # fetch and let it finish, so the source stream can be closed after
+        if next_unit is not None and not next_unit.done():
+            next_unit.cancel()
+            await asyncio.wait((next_unit,))
+
+def replay_cached_response(cached: dict) -> Iterator[bytes]:
+    """Replay a cached response with the same SSE events as a live one"""
+    if not cached["has_context"]:
+        yield _NO_CONTEXT_WARNING_FRAME
+    
+    yield format_sse_json({
+        "type": "status", 
+        "message": "Context retrieved, generating response...",
+        "stage": "generating_response",
+        "context_length": cached["context_length"]
+    }, "status")
+    
+    yield _RESPONSE_START_FRAME
+    
+    # Responses cached by the non-streaming endpoint are replayed as one chunk
+    chunks = cached["chunks"] or [cached["full_response"]]
+    for chunk_id, chunk in enumerate(chunks, 1):
+        yield format_sse_json({
+            "type": "chunk",
+            "content": chunk,
+            "chunk_id": chunk_id
+        }, "chunk")
+    
+    yield format_sse_json({
+        "type": "response_complete",
+        "message": "Response completed",
+        "full_response": cached["full_response"],
+        "chunk_count": len(chunks),
+        "word_count": len(cached["full_response"].split())
+    }, "response_complete")
+    
+    yield _DONE_FRAME
 
-async def generate_streaming_response(message: str, company_id: str):
+async def generate_streaming_response(request: Request, message: str, company_id: str):
     """
     Generator function for streaming chat responses
     
     Args:
+        request: Incoming request, polled to stop generating once the client disconnects
         message: User message
         company_id: Company identifier
         
     Yields:
-        SSE formatted strings
+        SSE formatted frames (bytes)
     """
-    logger.info(f"Starting streaming response | Company: {company_id} | Message: {message}")
+    logger.info("Starting streaming response | Company: %s | Message: %s", company_id, message)
     
     try:
         # Send initial status
-        yield format_sse_json({
-            "type": "status",
-            "message": "Processing your request...",
-            "stage": "retrieving_context"
-        }, "status")
+        yield _STATUS_RETRIEVING_FRAME
+        
+        # ---------------------------
+        # Semantic Response Cache
+        # ---------------------------
+        message_embedding = await embed_message_for_cache(message)
+        if message_embedding is not None:
+            cached = response_cache.get(company_id, message_embedding)
+            if cached is not None:
+                logger.info("Response cache hit | Company: %s", company_id)
+                for frame in replay_cached_response(cached):
+                    yield frame
+                return
         
         # ---------------------------
         # Retrieve Relevant Context
         # ---------------------------
-        context = retrieve_context(message, company_id)
-        if not context:
-            logger.warning(f"No context found for company '{company_id}' and message: '{message}'")
-            yield format_sse_json({
-                "type": "warning",
-                "message": "No relevant context found for this query."
-            }, "warning")
+        # The LLM connection is checked and opened while retrieval runs
+        session_task = asyncio.create_task(ensure_session())
+        try:
+            context = await retrieve_context_async(message, company_id, message_embedding)
+            has_context = bool(context)
+            if not context:
+                logger.warning("No context found for company '%s' and message: '%s'", company_id, message)
+                yield _NO_CONTEXT_WARNING_FRAME
             
-            # Continue with a generic response
-            context = "No specific context available."
+                # Continue with a generic response
+                context = "No specific context available."
         
-        logger.info(f"Retrieved context (length: {len(context)} characters)")
+            logger.info("Retrieved context (length: %d characters)", len(context))
         
-        # Send context retrieved status
-        yield format_sse_json({
-            "type": "status", 
-            "message": "Context retrieved, generating response...",
-            "stage": "generating_response",
-            "context_length": len(context)
-        }, "status")
+            # Send context retrieved status
+            yield format_sse_json({
+                "type": "status", 
+                "message": "Context retrieved, generating response...",
+                "stage": "generating_response",
+                "context_length": len(context)
+            }, "status")
         
-        # ---------------------------
-        # Build Prompt
-        # ---------------------------
-        prompt = build_prompt(context, message)
-        logger.debug(f"Generated prompt:\n{prompt[:1000]}...")
-        logger.info("Prompt successfully generated")
+            # ---------------------------
+            # Build Prompt
+            # ---------------------------
+            prompt = build_prompt(context, message)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Generated prompt:\n%s...", prompt[:1000])
+            logger.info("Prompt successfully generated")
         
-        # Send response start indicator
-        yield format_sse_json({
-            "type": "response_start",
-            "message": "AI is responding..."
-        }, "response_start")
+            # Send response start indicator
+            yield _RESPONSE_START_FRAME
+        
+            llm_ready = await session_task
+        finally:
+            # A disconnect or error before the await leaves the check running;
+            # it must not go on to start Ollama for a request that is gone
+            if not session_task.done():
+                session_task.cancel()
         
         # ---------------------------
         # Stream Language Model Response
         # ---------------------------
-        full_response = ""
+        # Chunks are collected in a list and joined once at the end; the word
+        # count is kept as they arrive (a word split across two chunks is
+        # counted once)
+        chunks = []
         chunk_count = 0
+        response_length = 0
+        word_count = 0
+        in_word = False
+        stream_failed = False
+        client_disconnected = False
         
+        llm_stream = astream_mistral_response(prompt, check_server=not llm_ready)
+        chunk_stream = coalesce_chunks(llm_stream)
         try:
-            for chunk in stream_mistral_response_buffered(prompt, buffer_size=3):
+            async for chunk in chunk_stream:
+                # Stop as soon as the client is gone; closing the streams below
+                # closes the Ollama connection, which ends the generation
+                if await request.is_disconnected():
+                    client_disconnected = True
+                    break
+                
                 if chunk.strip():
-                    full_response += chunk
+                    chunks.append(chunk)
                     chunk_count += 1
+                    response_length += len(chunk)
+                    word_count += len(chunk.split())
+                    if in_word and not chunk[0].isspace():
+                        word_count -= 1
+                    in_word = not chunk[-1].isspace()
+                    if chunk.startswith("[Error"):
+                        stream_failed = True
                     
                     # Send the chunk
                     yield format_sse_json({
@@ -134,107 +329,144 @@ async def generate_streaming_response(message: str, company_id: str):
                         "chunk_id": chunk_count
                     }, "chunk")
                     
-                    # Add small delay to prevent overwhelming the client
-                    await asyncio.sleep(0.02)
+                    # No fixed delay: the response socket applies backpressure.
+                    # Still hand control back to the event loop now and then
+                    # in case chunks arrive already buffered
+                    if chunk_count % _YIELD_EVERY_CHUNKS == 0:
+                        await asyncio.sleep(0)
             
-            logger.info(f"Streaming completed | Chunks sent: {chunk_count} | Response length: {len(full_response)}")
+            if client_disconnected:
+                logger.info("Client disconnected, generation stopped | Chunks sent: %d", chunk_count)
+                return
+            logger.info("Streaming completed | Chunks sent: %d | Response length: %d", chunk_count, response_length)
             
         except Exception as e:
-            logger.exception(f"Error during LLM streaming: {e}")
+            logger.exception("Error during LLM streaming: %s", e)
             yield format_sse_json({
                 "type": "error",
                 "message": f"Error generating response: {str(e)}"
             }, "error")
             return
         
+        finally:
+            # Also runs when the response task is cancelled on disconnect;
+            # the inner stream is closed explicitly since async for does not
+            await chunk_stream.aclose()
+            await llm_stream.aclose()
+        
         # ---------------------------
         # Send completion status
         # ---------------------------
+        full_response = "".join(chunks).strip()
         yield format_sse_json({
             "type": "response_complete",
             "message": "Response completed",
-            "full_response": full_response.strip(),
+            "full_response": full_response,
             "chunk_count": chunk_count,
-            "word_count": len(full_response.split())
+            "word_count": word_count
         }, "response_complete")
         
+        # Remember complete, successful responses for similar follow-up messages
+        if message_embedding is not None and chunk_count and not stream_failed:
+            response_cache.put(company_id, message_embedding, {
+                "has_context": has_context,
+                "context_length": len(context),
+                "chunks": chunks,
+                "full_response": full_response
+            })
+        
         # Final done event
-        yield format_sse_message("DONE", "done")
+        yield _DONE_FRAME
         
     except Exception as e:
-        logger.exception(f"Streaming chat handling failed: {e}")
+        logger.exception("Streaming chat handling failed: %s", e)
         yield format_sse_json({
             "type": "error",
             "message": f"Internal error: {str(e)}"
         }, "error")
-        yield format_sse_message("ERROR", "done")
+        yield _ERROR_DONE_FRAME
 
 @chat_router.post("/")
-async def chat(req: ChatRequest):
+async def chat(req: ChatRequest, request: Request):
     """
     Enhanced chat endpoint with optional streaming support
     """
-    logger.info(f"Received chat request | Company: {req.company_id} | Message: {req.message} | Stream: {req.stream}")
+    logger.info("Received chat request | Company: %s | Message: %s | Stream: %s", req.company_id, req.message, req.stream)
 
     # If streaming is requested, redirect to streaming endpoint
     if req.stream:
         return StreamingResponse(
-            generate_streaming_response(req.message, req.company_id),
-            media_type="text/plain",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "Content-Type": "text/event-stream"
-            }
+            generate_streaming_response(request, req.message, req.company_id),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
         )
 
     # Original non-streaming implementation for backward compatibility
     try:
+        # ---------------------------
+        # Semantic Response Cache
+        # ---------------------------
+        message_embedding = await embed_message_for_cache(req.message)
+        if message_embedding is not None:
+            cached = response_cache.get(req.company_id, message_embedding)
+            if cached is not None:
+                logger.info("Response cache hit | Company: %s", req.company_id)
+                if not cached["has_context"]:
+                    return {"response": "⚠️ No relevant context found for this query."}
+                return {"response": cached["full_response"]}
+        
         # ---------------------------
         # Retrieve Relevant Context
         # ---------------------------
-        context = retrieve_context(req.message, req.company_id)
+        context = await retrieve_context_async(req.message, req.company_id, message_embedding)
         if not context:
-            logger.warning(f"No context found for company '{req.company_id}' and message: '{req.message}'")
+            logger.warning("No context found for company '%s' and message: '%s'", req.company_id, req.message)
             return {"response": "⚠️ No relevant context found for this query."}
         
-        logger.info(f"Retrieved context (length: {len(context)} characters)")
+        logger.info("Retrieved context (length: %d characters)", len(context))
 
         # ---------------------------
         # Build Prompt
         # ---------------------------
         prompt = build_prompt(context, req.message)
-        logger.debug(f"Generated prompt:\n{prompt[:1000]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generated prompt:\n%s...", prompt[:1000])
         logger.info("Prompt successfully generated")
 
         # ---------------------------
         # Query Language Model (Non-streaming)
         # ---------------------------
-        response = query_mistral(prompt)
+        response = await asyncio.to_thread(query_mistral, prompt)
         if not response:
             logger.warning("LLM returned no response")
             return {"response": "⚠️ No response returned from the LLM."}
 
         logger.info("LLM responded successfully")
+        if message_embedding is not None and not response.startswith("[Error"):
+            response_cache.put(req.company_id, message_embedding, {
+                "has_context": True,
+                "context_length": len(context),
+                "chunks": None,
+                "full_response": response
+            })
         return {"response": response}
 
     except Exception as e:
-        logger.exception(f"Chat handling failed: {e}")
+        logger.exception("Chat handling failed: %s", e)
         return {"response": f"⚠️ Internal error: {str(e)}"}
 
 @chat_router.post("/stream")
-async def chat_stream(req: StreamingChatRequest):
+async def chat_stream(req: StreamingChatRequest, request: Request):
     """
     Dedicated streaming chat endpoint
     """
-    logger.info(f"Received streaming chat request | Company: {req.company_id} | Message: {req.message}")
+    logger.info("Received streaming chat request | Company: %s | Message: %s", req.company_id, req.message)
     
     return StreamingResponse(
-        generate_streaming_response(req.message, req.company_id),
+        generate_streaming_response(request, req.message, req.company_id),
         media_type="text/event-stream",
         headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
+            **SSE_HEADERS,
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Headers": "Cache-Control"
         }
@@ -250,7 +482,7 @@ async def test_streaming():
             yield format_sse_json({
                 "type": "test",
                 "message": f"Test message {i+1}",
-                "timestamp": str(asyncio.get_event_loop().time())
+                "timestamp": str(time.monotonic())
             }, "test")
             await asyncio.sleep(1)
         
@@ -259,8 +491,5 @@ async def test_streaming():
     return StreamingResponse(
         test_generator(),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive"
-        }
+        headers=SSE_HEADERS
     )
\ No newline at end of file
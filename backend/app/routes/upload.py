@@ -1,12 +1,17 @@
 # backend/app/routes/upload.py
 
+import asyncio
 import logging
-import json
-import shutil
+import os
+import uuid
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
+from typing import BinaryIO, Tuple
 from fastapi import APIRouter, UploadFile, Form, Query, HTTPException
-from app.ingest import parser, indexer
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from app.ingest import parser, indexer, metadata_db
 from app.config.settings import settings
 from app.ingest.vector_store import client, get_database_info, get_data_directories
 from app.ingest.quality import score_chunk_quality
@@ -19,68 +24,149 @@ logger.setLevel(logging.INFO)
 
 upload_router = APIRouter()
 
-def save_original_file(company_id: str, filename: str, file_content: bytes, document_hash: str) -> str:
-    """Save original file to documents directory with hash-based naming"""
+_UPLOAD_READ_SIZE = 64 * 1024  # bytes per read when writing an upload to disk
+
+_INCOMING_DIR = ".incoming"  # per-company staging directory for uploads being processed
+
+# Chunker document type by file extension
+_DOCUMENT_TYPE_MAP = {
+    '.pdf': 'pdf',
+    '.docx': 'docx', 
+    '.doc': 'docx',
+    '.txt': 'txt'
+}
+
+def _too_large_error() -> HTTPException:
+    """The error for uploads over max_file_size_mb"""
+    return HTTPException(
+        status_code=400, 
+        detail=f"File too large. Maximum size: {settings.max_file_size_mb}MB"
+    )
+
+def write_upload_to_disk(source: BinaryIO, temp_path: Path, max_file_size: int) -> Tuple[int, str]:
+    """
+    Copy an upload to temp_path block by block, enforcing the size limit as it
+    grows and hashing the bytes on the way. Blocking; run it in the threadpool.
+    Returns the file size and the document hash.
+    """
+    file_size = 0
+    hasher = indexer.new_document_hasher()
+    temp_path.parent.mkdir(parents=True, exist_ok=True)
+    with temp_path.open("wb") as f:
+        while block := source.read(_UPLOAD_READ_SIZE):
+            file_size += len(block)
+            if file_size > max_file_size:
+                raise _too_large_error()
+            hasher.update(block)
+            f.write(block)
+    return file_size, hasher.hexdigest()
+
+def _fallback_chunks(text: str) -> list:
+    """Fixed-size overlapping character windows, for when the smart chunker fails"""
+    size = settings.chunk_size
+    step = max(1, size - settings.chunk_overlap)
+    min_length = settings.min_chunk_length
+    windows = (text[start:start + size].strip() for start in range(0, len(text), step))
+    return list(islice((chunk for chunk in windows if len(chunk) >= min_length), settings.max_chunks_per_document))
+
+def _directory_usage(path: Path) -> Tuple[int, int]:
+    """Total size of the files under path and the number of entries, in one scandir walk"""
+    total_size = 0
+    entry_count = 0
+    pending = [path]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                entry_count += 1
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    total_size += entry.stat().st_size
+    return total_size, entry_count
+
+def _duplicate_response(filename: str, document_hash: str, existing_chunks: int, message: str) -> dict:
+    """Upload response for a document that is already indexed"""
+    return {
+        "status": "duplicate",
+        "message": message,
+        "filename": filename,
+        "document_hash": document_hash,
+        "existing_chunks": existing_chunks
+    }
+
+def incoming_upload_path(company_id: str, filename: str) -> Path:
+    """
+    A unique scratch path for an upload, inside the company's documents
+    directory so the original can later be moved into place with a rename
+    """
+    incoming_dir = get_data_directories()["documents"] / company_id / _INCOMING_DIR
+    # Keep the extension; the parser picks its format from it
+    return incoming_dir / f"{uuid.uuid4().hex}{Path(filename).suffix}"
+
+def sweep_incoming_uploads() -> int:
+    """
+    Remove uploads left staged by a crash or kill. Called at startup, before
+    any upload can be in flight. Returns the number of files removed.
+    """
+    removed = 0
+    for incoming_dir in get_data_directories()["documents"].glob(f"*/{_INCOMING_DIR}"):
+        for path in incoming_dir.iterdir():
+            try:
+                path.unlink()
+                removed += 1
+            except OSError as e:
+                logger.warning("Failed to remove stale staged upload %s: %s", path, e)
+    if removed:
+        logger.info("Removed %d stale staged upload(s)", removed)
+    return removed
+
+def _safe_name(document_hash: str, filename: str) -> str:
+    """Stored name of an original file; the hash prefix keeps same-named uploads apart"""
+    return f"{document_hash[:12]}_{filename}"
+
+def save_original_file(company_id: str, filename: str, source_path: Path, document_hash: str) -> str:
+    """Move the uploaded file into the documents directory with hash-based naming"""
     directories = get_data_directories()
     company_dir = directories["documents"] / company_id
     company_dir.mkdir(parents=True, exist_ok=True)
     
-    # Use hash in filename to handle duplicates and ensure uniqueness
-    file_extension = Path(filename).suffix
-    safe_filename = f"{document_hash[:12]}_{filename}"
-    file_path = company_dir / safe_filename
+    file_path = company_dir / _safe_name(document_hash, filename)
     
+    # The upload was written under .incoming on the same filesystem, so this
+    # is an atomic rename: no bytes are copied and no partial file is visible
     try:
-        with open(file_path, 'wb') as f:
-            f.write(file_content)
-        logger.info(f"Saved original file: {file_path}")
+        os.replace(source_path, file_path)
+        logger.info("Saved original file: %s", file_path)
         return str(file_path)
     except Exception as e:
-        logger.error(f"Failed to save original file: {e}")
+        logger.error("Failed to save original file: %s", e)
         raise
 
-def delete_original_file(company_id: str, document_hash: str, filename: str) -> bool:
+def delete_original_file(company_id: str, document_hash: str, filename: str, original_file_path: str = "") -> bool:
     """Delete original file from documents directory"""
-    directories = get_data_directories()
-    company_dir = directories["documents"] / company_id
-    
-    # Try to find file by hash-based name first
-    file_extension = Path(filename).suffix
-    hash_based_filename = f"{document_hash[:12]}_{filename}"
-    hash_based_path = company_dir / hash_based_filename
-    
-    # Also try original filename as fallback
-    original_path = company_dir / filename
+    if original_file_path:
+        # The path recorded at upload time is the file; nothing to search for
+        candidates = [Path(original_file_path)]
+    else:
+        # No recorded path: try the hash-based name, then the original filename
+        company_dir = get_data_directories()["documents"] / company_id
+        candidates = [company_dir / _safe_name(document_hash, filename), company_dir / filename]
     
     deleted = False
-    for file_path in [hash_based_path, original_path]:
+    for file_path in candidates:
         if file_path.exists():
             try:
                 file_path.unlink()
-                logger.info(f"Deleted original file: {file_path}")
+                logger.info("Deleted original file: %s", file_path)
                 deleted = True
             except Exception as e:
-                logger.error(f"Failed to delete original file {file_path}: {e}")
+                logger.error("Failed to delete original file %s: %s", file_path, e)
     
     return deleted
 
 def save_document_metadata(company_id: str, filename: str, file_size: int, 
                           document_hash: str, chunks_stored: int, original_file_path: str) -> None:
     """Save document metadata for tracking and management"""
-    directories = get_data_directories()
-    metadata_file = directories["metadata"] / f"{company_id}_documents.json"
-    
-    # Load existing metadata
-    documents_metadata = []
-    if metadata_file.exists():
-        try:
-            with open(metadata_file, 'r') as f:
-                documents_metadata = json.load(f)
-        except Exception as e:
-            logger.warning(f"Could not load existing metadata: {e}")
-            documents_metadata = []
-    
-    # Add new document metadata
     document_info = {
         "filename": filename,
         "document_hash": document_hash,
@@ -91,82 +177,37 @@ def save_document_metadata(company_id: str, filename: str, file_size: int,
         "original_file_path": original_file_path
     }
     
-    # Remove any existing entry with same filename or hash (replace)
-    documents_metadata = [
-        doc for doc in documents_metadata 
-        if doc.get("filename") != filename and doc.get("document_hash") != document_hash
-    ]
-    documents_metadata.append(document_info)
-    
-    # Save updated metadata
+    # Replaces any existing entry with same filename or hash
     try:
-        with open(metadata_file, 'w') as f:
-            json.dump(documents_metadata, f, indent=2)
-        logger.info(f"Saved metadata for document: {filename}")
+        metadata_db.upsert_document(document_info)
+        logger.info("Saved metadata for document: %s", filename)
     except Exception as e:
-        logger.error(f"Failed to save document metadata: {e}")
+        logger.error("Failed to save document metadata: %s", e)
 
 def get_company_documents(company_id: str) -> list:
     """Get list of documents for a company"""
-    directories = get_data_directories()
-    metadata_file = directories["metadata"] / f"{company_id}_documents.json"
-    
-    if not metadata_file.exists():
-        return []
-    
     try:
-        with open(metadata_file, 'r') as f:
-            return json.load(f)
+        return metadata_db.list_documents(company_id)
     except Exception as e:
-        logger.error(f"Failed to load company documents: {e}")
+        logger.error("Failed to load company documents: %s", e)
         return []
 
 def remove_document_metadata(company_id: str, document_hash: str) -> tuple[bool, dict]:
     """Remove document from metadata tracking and return the removed document info"""
-    directories = get_data_directories()
-    metadata_file = directories["metadata"] / f"{company_id}_documents.json"
-    
-    if not metadata_file.exists():
-        return False, {}
-    
     try:
-        with open(metadata_file, 'r') as f:
-            documents_metadata = json.load(f)
-        
-        # Find and remove the document by hash
-        removed_doc = None
-        original_count = len(documents_metadata)
-        new_metadata = []
-        
-        for doc in documents_metadata:
-            if doc.get("document_hash") == document_hash:
-                removed_doc = doc
-            else:
-                new_metadata.append(doc)
-        
-        # Save updated metadata
-        with open(metadata_file, 'w') as f:
-            json.dump(new_metadata, f, indent=2)
-        
-        # If no documents left, delete the metadata file
-        if not new_metadata:
-            metadata_file.unlink()
-            logger.info(f"Deleted empty metadata file: {metadata_file}")
-        
-        removed = len(new_metadata) < original_count
-        if removed:
-            logger.info(f"Removed metadata for document with hash: {document_hash[:16]}...")
-        
-        return removed, removed_doc or {}
+        removed_doc = metadata_db.remove_document(company_id, document_hash)
+        if removed_doc is not None:
+            logger.info("Removed metadata for document with hash: %s...", document_hash[:16])
+        return removed_doc is not None, removed_doc or {}
         
     except Exception as e:
-        logger.error(f"Failed to remove document metadata: {e}")
+        logger.error("Failed to remove document metadata: %s", e)
         return False, {}
 
 @upload_router.post("/")
 async def upload_file(file: UploadFile, company_id: str = Form(...)):
     """Enhanced file upload with comprehensive validation and processing"""
-    logger.info(f"Received upload request | File: {file.filename} | Company: {company_id}")
+    logger.info("Received upload request | File: %s | Company: %s", file.filename, company_id)
     
     # ---------------------------
     # Input Validation
@@ -184,53 +225,64 @@ async def upload_file(file: UploadFile, company_id: str = Form(...)):
             detail=f"Unsupported file type. Supported types: {settings.supported_file_types}"
         )
     
-    # Read and validate file content
-    try:
-        file_content = await file.read()
-        file_size = len(file_content)
-        
-        if file_size == 0:
-            raise HTTPException(status_code=400, detail="Empty file uploaded")
-        
-        if file_size > settings.get_max_file_size_bytes():
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File too large. Maximum size: {settings.max_file_size_mb}MB"
-            )
-        
-        logger.info(f"File validation passed | Size: {file_size} bytes")
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.exception(f"Error reading uploaded file: {e}")
-        raise HTTPException(status_code=500, detail="Failed to read uploaded file")
+    max_file_size = settings.get_max_file_size_bytes()
+    if file.size is not None and file.size > max_file_size:
+        raise _too_large_error()
     
     # ---------------------------
     # Temporary File Processing
     # ---------------------------
-    temp_path = Path(f"/tmp/{file.filename}")
+    temp_path = incoming_upload_path(company_id, file.filename)
     
     try:
-        # Save uploaded file temporarily
-        with temp_path.open("wb") as f:
-            f.write(file_content)
-        logger.info(f"Saved uploaded file to temporary path: {temp_path}")
+        # Stream the upload to the temporary file instead of reading it into
+        # memory; the whole copy runs in one worker thread, off the event loop
+        try:
+            file_size, document_hash = await run_in_threadpool(write_upload_to_disk, file.file, temp_path, max_file_size)
+            
+            if file_size == 0:
+                raise HTTPException(status_code=400, detail="Empty file uploaded")
+            
+            logger.info("File validation passed | Size: %d bytes", file_size)
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.exception("Error reading uploaded file: %s", e)
+            raise HTTPException(status_code=500, detail="Failed to read uploaded file")
+        
+        logger.info("Saved uploaded file to temporary path: %s", temp_path)
+        
+        # ---------------------------
+        # Early duplicate check
+        # ---------------------------
+        # The hash is known as soon as the file is written, so a re-upload is
+        # answered before any parsing, chunking or embedding
+        try:
+            existing_chunks = await run_in_threadpool(indexer.get_existing_chunk_ids, company_id, document_hash)
+        except Exception as e:
+            existing_chunks = []
+            logger.debug("Early duplicate check skipped, store_chunks will check again: %s", e)
+        if existing_chunks:
+            logger.info("Duplicate document detected before parsing: %s", file.filename)
+            return _duplicate_response(
+                file.filename, document_hash, len(existing_chunks), "Document already exists in the database"
+            )
         
         # ---------------------------
         # Parse text from file
         # ---------------------------
         try:
-            text_content = parser.load_file_text(temp_path)
+            text_content = await run_in_threadpool(parser.load_file_text, temp_path)
             if not text_content.strip():
                 raise HTTPException(status_code=400, detail="Document contains no readable text")
             
-            logger.info(f"Extracted text from file | Length: {len(text_content)} characters")
+            logger.info("Extracted text from file | Length: %d characters", len(text_content))
             
         except ValueError as e:
             raise HTTPException(status_code=400, detail=f"File parsing error: {str(e)}")
         except Exception as e:
-            logger.exception(f"Unexpected error during file parsing: {e}")
+            logger.exception("Unexpected error during file parsing: %s", e)
             raise HTTPException(status_code=500, detail="Failed to parse document content")
         
         # ---------------------------
@@ -239,25 +291,20 @@ async def upload_file(file: UploadFile, company_id: str = Form(...)):
         from app.ingest.chunker import chunk_document
         
         # Determine document type from file extension
-        file_extension = Path(file.filename).suffix.lower()
-        document_type_map = {
-            '.pdf': 'pdf',
-            '.docx': 'docx', 
-            '.doc': 'docx',
-            '.txt': 'txt'
-        }
-        document_type = document_type_map.get(file_extension, 'generic')
+        document_type = _DOCUMENT_TYPE_MAP.get(Path(file.filename).suffix.lower(), 'generic')
         
-        logger.info(f"Using document type: {document_type} for file: {file.filename}")
+        logger.info("Using document type: %s for file: %s", document_type, file.filename)
 
         # Log chunking statistics
         chunk_types = {}
         total_words = 0
         total_sentences = 0
+        chunking_method = "fallback"  # set to "smart" once the smart chunker succeeds
     
         # Use smart chunker
         try:
-            chunk_results = chunk_document(
+            chunk_results = await run_in_threadpool(
+                chunk_document,
                 text=text_content,
                 document_type=document_type,
                 chunk_size=settings.chunk_size,
@@ -266,7 +313,7 @@ async def upload_file(file: UploadFile, company_id: str = Form(...)):
 
 
             if settings.enable_chunk_quality_score:
-                chunk_results = score_chunk_quality(chunk_results)
+                chunk_results = await run_in_threadpool(score_chunk_quality, chunk_results)
             
             if not chunk_results:
                 raise HTTPException(status_code=400, detail="Document produced no valid chunks after smart processing")
@@ -276,7 +323,7 @@ async def upload_file(file: UploadFile, company_id: str = Form(...)):
             
             # Safety check against very large documents
             if len(chunks) > settings.max_chunks_per_document:
-                logger.warning(f"Document too large, truncating from {len(chunks)} to {settings.max_chunks_per_document} chunks")
+                logger.warning("Document too large, truncating from %d to %d chunks", len(chunks), settings.max_chunks_per_document)
                 chunks = chunks[:settings.max_chunks_per_document]
                 chunk_results = chunk_results[:settings.max_chunks_per_document]
             
@@ -289,72 +336,64 @@ async def upload_file(file: UploadFile, company_id: str = Form(...)):
                 total_words += metadata.get("word_count", 0)
                 total_sentences += metadata.get("sentence_count", 0)
             
-            logger.info(f"Smart chunking completed | Chunks: {len(chunks)} | Types: {chunk_types} | Words: {total_words} | Sentences: {total_sentences}")
+            logger.info("Smart chunking completed | Chunks: %d | Types: %s | Words: %d | Sentences: %d", len(chunks), chunk_types, total_words, total_sentences)
+            chunking_method = "smart"
             
         except Exception as e:
-            logger.exception(f"Smart chunking failed, falling back to basic chunking: {e}")
+            logger.exception("Smart chunking failed, falling back to basic chunking: %s", e)
             
             # Fallback to basic chunking if smart chunker fails
-            chunks = []
-            start = 0
-            while start < len(text_content):
-                end = start + settings.chunk_size
-                chunk = text_content[start:end]
-                
-                if len(chunk.strip()) >= settings.min_chunk_length:
-                    chunks.append(chunk.strip())
-                
-                start = end - settings.chunk_overlap
-                
-                if len(chunks) > settings.max_chunks_per_document:
-                    break
+            chunks = await run_in_threadpool(_fallback_chunks, text_content)
             
-            logger.info(f"Fallback chunking completed | Chunks: {len(chunks)}")
+            logger.info("Fallback chunking completed | Chunks: %d", len(chunks))
             
             if not chunks:
                 raise HTTPException(status_code=400, detail="Document produced no valid chunks")
         
+        # Only the chunks are needed from here on; release the full text
+        # before embedding rather than holding it for the whole request
+        del text_content
+        
         # ---------------------------
         # Store chunks in vector DB with enhanced metadata
         # ---------------------------
-        storage_result = indexer.store_chunks(
+        storage_result = await run_in_threadpool(
+            indexer.store_chunks,
             text_chunks=chunks, 
             namespace=company_id, 
-            document_content=text_content
+            document_hash=document_hash
         )
         
         if storage_result["status"] == "error":
             raise HTTPException(status_code=500, detail=storage_result["message"])
         
         if storage_result["status"] == "duplicate":
-            logger.info(f"Duplicate document detected: {file.filename}")
-            return {
-                "status": "duplicate",
-                "message": storage_result["message"],
-                "filename": file.filename,
-                "document_hash": storage_result["document_hash"],
-                "existing_chunks": storage_result["existing_chunks"]
-            }
+            logger.info("Duplicate document detected: %s", file.filename)
+            return _duplicate_response(
+                file.filename, storage_result["document_hash"], storage_result["existing_chunks"], storage_result["message"]
+            )
         
         # ---------------------------
         # Save original file
         # ---------------------------
         original_file_path = ""
         try:
-            original_file_path = save_original_file(
+            original_file_path = await run_in_threadpool(
+                save_original_file,
                 company_id=company_id,
                 filename=file.filename,
-                file_content=file_content,
+                source_path=temp_path,
                 document_hash=storage_result["document_hash"]
             )
         except Exception as e:
-            logger.warning(f"Failed to save original file (non-critical): {e}")
+            logger.warning("Failed to save original file (non-critical): %s", e)
         
         # ---------------------------
         # Save document metadata
         # ---------------------------
         try:
-            save_document_metadata(
+            await run_in_threadpool(
+                save_document_metadata,
                 company_id=company_id,
                 filename=file.filename,
                 file_size=file_size,
@@ -363,7 +402,7 @@ async def upload_file(file: UploadFile, company_id: str = Form(...)):
                 original_file_path=original_file_path
             )
         except Exception as e:
-            logger.warning(f"Failed to save document metadata (non-critical): {e}")
+            logger.warning("Failed to save document metadata (non-critical): %s", e)
         
         # ---------------------------
         # Success response with detailed information
@@ -383,12 +422,12 @@ async def upload_file(file: UploadFile, company_id: str = Form(...)):
                 "chunk_overlap": settings.chunk_overlap,
                 "min_chunk_length": settings.min_chunk_length,
                 "document_type": document_type,
-                "chunking_method": "smart" if 'chunk_results' in locals() else "fallback"
+                "chunking_method": chunking_method
             }
         }
         
         # Add chunking statistics if available
-        if 'chunk_results' in locals() and chunk_results:
+        if chunking_method == "smart":
             chunk_stats = {
                 "chunk_types": chunk_types,
                 "total_words": total_words,
@@ -398,13 +437,13 @@ async def upload_file(file: UploadFile, company_id: str = Form(...)):
             }
             response["chunking_statistics"] = chunk_stats
         
-        logger.info(f"✅ Upload completed successfully | File: {file.filename} | Chunks: {storage_result['chunks_stored']} | Method: {response['processing_settings']['chunking_method']}")
+        logger.info("✅ Upload completed successfully | File: %s | Chunks: %d | Method: %s", file.filename, storage_result['chunks_stored'], chunking_method)
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"Upload processing failed: {e}")
+        logger.exception("Upload processing failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
     
     finally:
@@ -412,15 +451,15 @@ async def upload_file(file: UploadFile, company_id: str = Form(...)):
         if temp_path.exists():
             try:
                 temp_path.unlink(missing_ok=True)
-                logger.info(f"Temporary file deleted: {temp_path}")
+                logger.info("Temporary file deleted: %s", temp_path)
             except Exception as e:
-                logger.warning(f"Failed to delete temporary file: {e}")
+                logger.warning("Failed to delete temporary file: %s", e)
 
 
-@upload_router.get("/files")
+@upload_router.get("/files", response_class=ORJSONResponse)
 def list_company_files(company_id: str = Query(...)):
     """Get list of uploaded files for a company"""
-    logger.info(f"Retrieving file list for company: {company_id}")
+    logger.info("Retrieving file list for company: %s", company_id)
     
     try:
         documents = get_company_documents(company_id)
@@ -428,32 +467,28 @@ def list_company_files(company_id: str = Query(...)):
         # Get collection statistics
         collection_stats = indexer.get_collection_stats(company_id)
         
-        return {
+        # Returned as a response so the document list is serialized by orjson
+        # directly, skipping FastAPI's jsonable_encoder pass over every record
+        return ORJSONResponse({
             "company_id": company_id,
             "documents": documents,
             "total_documents": len(documents),
             "collection_stats": collection_stats
-        }
+        })
         
     except Exception as e:
-        logger.exception(f"Failed to retrieve file list: {e}")
+        logger.exception("Failed to retrieve file list: %s", e)
         raise HTTPException(status_code=500, detail="Failed to retrieve file list")
 
 
 @upload_router.delete("/{filename}")
-def delete_file(filename: str, company_id: str = Query(...)):
+async def delete_file(filename: str, company_id: str = Query(...)):
     """Enhanced file deletion with proper cleanup of all data"""
-    logger.info(f"Received delete request | File: {filename} | Company: {company_id}")
+    logger.info("Received delete request | File: %s | Company: %s", filename, company_id)
     
     try:
         # Get document metadata to find the hash
-        documents = get_company_documents(company_id)
-        target_document = None
-        
-        for doc in documents:
-            if doc.get("filename") == filename:
-                target_document = doc
-                break
+        target_document = await run_in_threadpool(metadata_db.find_document_by_filename, company_id, filename)
         
         if not target_document:
             raise HTTPException(status_code=404, detail=f"Document '{filename}' not found")
@@ -465,20 +500,25 @@ def delete_file(filename: str, company_id: str = Query(...)):
         # ---------------------------
         # Delete chunks from vector store
         # ---------------------------
-        deletion_result = indexer.delete_document_chunks(company_id, document_hash)
+        deletion_result = await run_in_threadpool(indexer.delete_document_chunks, company_id, document_hash)
         
+        # The original file and metadata are kept when the chunks could not
+        # be deleted, so the document stays intact and the delete can be retried
         if deletion_result["status"] == "error":
             raise HTTPException(status_code=500, detail=deletion_result["message"])
         
         # ---------------------------
-        # Delete original file
+        # Delete original file and remove from metadata tracking
         # ---------------------------
-        original_file_deleted = delete_original_file(company_id, document_hash, filename)
-        
-        # ---------------------------
-        # Remove from metadata tracking
-        # ---------------------------
-        metadata_removed, removed_doc = remove_document_metadata(company_id, document_hash)
+        # Independent of each other, so both run at once; both helpers report
+        # failures in their result instead of raising
+        original_file_deleted, (metadata_removed, removed_doc) = await asyncio.gather(
+            run_in_threadpool(
+                delete_original_file, company_id, document_hash, filename,
+                target_document.get("original_file_path") or ""
+            ),
+            run_in_threadpool(remove_document_metadata, company_id, document_hash)
+        )
         
         response = {
             "status": "deleted",
@@ -497,13 +537,13 @@ def delete_file(filename: str, company_id: str = Query(...)):
         if deletion_result["status"] == "not_found":
             response["warning"] = "No chunks found in vector store, but other data was cleaned up"
         
-        logger.info(f"🗑️ File deletion completed | File: {filename} | Chunks deleted: {deletion_result['deleted_count']} | Original file deleted: {original_file_deleted}")
+        logger.info("🗑️ File deletion completed | File: %s | Chunks deleted: %d | Original file deleted: %s", filename, deletion_result['deleted_count'], original_file_deleted)
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"Deletion failed for file '{filename}': {e}")
+        logger.exception("Deletion failed for file '%s': %s", filename, e)
         raise HTTPException(status_code=500, detail=f"Deletion failed: {str(e)}")
 
 
@@ -518,8 +558,7 @@ def get_system_info():
         storage_info = {}
         for name, path in directories.items():
             if Path(path).exists():
-                total_size = sum(f.stat().st_size for f in Path(path).rglob('*') if f.is_file())
-                file_count = len(list(Path(path).rglob('*')))
+                total_size, file_count = _directory_usage(path)
                 storage_info[name] = {
                     "path": str(path),
                     "total_size_bytes": total_size,
@@ -543,5 +582,5 @@ def get_system_info():
         }
         
     except Exception as e:
-        logger.exception(f"Error getting system info: {e}")
+        logger.exception("Error getting system info: %s", e)
         raise HTTPException(status_code=500, detail="Failed to retrieve system information")
\ No newline at end of file